@@ -3,11 +3,14 @@ Script to create synthetic recordings in the Dataset from current recordings.
 """
 import argparse
 import os
+import re
 import logging
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
 from random import choice as pick_one
 from time import time
-from multiprocessing import Process, Queue
 from core import *
+from core import _uring_reader
 
 formatter = logging.Formatter('%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s')
 logging.basicConfig(level=logging.DEBUG,
@@ -16,18 +19,71 @@ log = logging.getLogger('spread')
 log.setLevel(logging.DEBUG)
 
 
+# Shared pool for fanning in the many small annotation files; the reads release the GIL
+_read_pool = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4)
+
+# Extracts the recording name from a path, dropping the directory and the .32fc extension
+_REC_NAME_RE = re.compile(r'(?:.*/)?([^/]+?)(?:\.32fc)?$')
+
+
+def _read_annotation_text(path):
+    """
+    Reads an annotation file and returns its stripped contents, or None if the file is missing
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+
+def _read_many_annotations(paths):
+    """
+    Reads a batch of annotation files, returning a list with the stripped contents of each file or
+    None for missing ones. Uses the io_uring reader when its bindings are available, the thread
+    pool otherwise.
+    """
+    if _uring_reader.URING_AVAILABLE:
+        return [data.decode().strip() if data is not None else None
+                for data in _uring_reader.read_many(paths)]
+    return list(_read_pool.map(_read_annotation_text, paths))
+
+
+def _write_annotation_files(outputs):
+    """
+    Flushes the queued annotation outputs, given as (outfile, chunks) pairs, with one
+    gather-write per file instead of joining the chunks into an intermediate string
+    """
+    for outfile, chunks in outputs:
+        with open(outfile, 'w') as f:
+            f.writelines(chunks)
+
+
 def get_obj_from_files(ds, from_files):
     """
     Returns a list of objects based on their filenames
     """
-    from_files = [os.path.basename(x).split('.32fc')[0] for x in from_files]  # get rid of file path and extension
-    rec_obj_list = sorted([ds.recordings_dict[x] for x in from_files], key=lambda rec: rec.id)
+    names = [_REC_NAME_RE.match(x).group(1) for x in from_files]  # get rid of file path and extension
+    rec_obj_list = sorted([ds.recordings_dict[x] for x in names], key=attrgetter('id'))
     return rec_obj_list
 
 
-def get_obj_from_properties(ds, from_properties):
+def _flush_skipped_combos(skipped):
+    """
+    Appends the collected property combinations that matched no recording to the skipped
+    combinations file, in a single write
+    """
+    if not skipped:
+        return
+    skipped_combos = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skipped_combs.txt")
+    with open(skipped_combos, 'a') as sc:
+        sc.write('\n'.join(skipped) + '\n')
+
+
+def get_obj_from_properties(ds, from_properties, skipped_sink=None):
     """
-    Returns a list of objects based on their properties
+    Returns a list of objects based on their properties. Property combinations that match no
+    recording are collected in skipped_sink (if given) instead of being written out directly.
     """
     rec_obj_list = []
     for rec_prop in from_properties:
@@ -37,13 +93,14 @@ def get_obj_from_properties(ds, from_properties):
         filtered = ds.filter_recordings(rec_prop)
         if not filtered:
             log.error("No recording found that satisfies the properties: %s", ','.join(rec_prop))
-            skipped_combos = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skipped_combs.txt")
-            with open(skipped_combos, 'a') as sc:
-                sc.write("%s\n" % ' '.join(from_properties))
+            if skipped_sink is not None:
+                skipped_sink.append(' '.join(from_properties))
+            else:
+                _flush_skipped_combos([' '.join(from_properties)])
             return
         which_one = pick_one(filtered)
         rec_obj_list.append(which_one)
-    rec_obj_list.sort(key=lambda rec: rec.id)
+    rec_obj_list.sort(key=attrgetter('id'))
     return rec_obj_list
 
 
@@ -55,20 +112,25 @@ def combine_recordings(dataset, from_files, from_properties, to_files, ds=None,
     the options given.
     """
 
-    if q:
+    # Prefer a Dataset built by the parent and inherited through fork (ds=) over
+    # pulling one through a queue, which pickles the whole recording graph per call
+    if not ds and q:
         ds = q.get()
     if not ds:
         ds = Dataset(dataset)
 
     # Either get recordings explicitly from filenames
+    skipped = []
     if from_files:
         rec_obj_list = get_obj_from_files(ds, from_files)
     # choose random recordings based on input filters
     elif from_properties:
-        rec_obj_list = get_obj_from_properties(ds, from_properties)
+        rec_obj_list = get_obj_from_properties(ds, from_properties, skipped_sink=skipped)
     else:
         rec_obj_list = None
     if not rec_obj_list:
+        # Record any property combinations that could not be satisfied, in one write
+        _flush_skipped_combos(skipped)
         log.info("No recordings to combine, skipping.")
         return
 
@@ -103,18 +165,9 @@ def combine_annotations(dataset, synthetics=None, ds=None):
             log.error("Synthetic not found.")
             continue
         log.info("Creating synthetic annotations for recording %s", syn.name)
-        if not os.path.isdir(syn.rec_pics_dir):
-            try:
-                os.mkdir(syn.rec_pics_dir)
-            except OSError:
-                pass
-        if not os.path.isdir(syn.synthetic_annotations_dir):
-            os.mkdir(syn.synthetic_annotations_dir)
-        if not os.path.isdir(syn.compressed_pics_dir):
-            try:
-                os.mkdir(syn.compressed_pics_dir)
-            except OSError:
-                pass
+        os.makedirs(syn.rec_pics_dir, exist_ok=True)
+        os.makedirs(syn.synthetic_annotations_dir, exist_ok=True)
+        os.makedirs(syn.compressed_pics_dir, exist_ok=True)
 
         sources = [ds.recordings_dict.get(x, None) for x in syn.metadata.sources]
 
@@ -124,62 +177,62 @@ def combine_annotations(dataset, synthetics=None, ds=None):
                      ' '.join([x for x in syn.metadata.sources if not ds.recordings_dict.get(x, None)]))
             continue
 
+        # Queued (outfile, chunks) annotation outputs, flushed in one pass per synthetic
+        outputs = []
+
         # Check if all source recordings have compressed annotations and use these first
-        if all([x.compressed_annotation_list for x in sources]):
+        if all(x.compressed_annotation_list for x in sources):
             log.info("Using compressed annotations.")
             for compr_ann in sources[0].compressed_annotation_list:
                 syn_pic_id = get_id_from_pic_name(os.path.basename(compr_ann))
                 pic_annotations = []
 
-                # Find the corresponding annotation of every source file
-                for src_rec in sources:
-                    src_ann_file = os.path.join(src_rec.compressed_pics_dir, src_rec.pic_prefix + "_" + str(syn_pic_id)
-                                                + ".txt")
-                    try:
-                        with open(src_ann_file, 'r') as f:
-                            src_annot = f.read().strip().split('\n')
-                    except IOError:
+                # Read the corresponding annotation of every source file in one batch
+                src_ann_files = [os.path.join(src_rec.compressed_pics_dir,
+                                              src_rec.pic_prefix + "_" + str(syn_pic_id) + ".txt")
+                                 for src_rec in sources]
+                for src_ann_file, src_annot in zip(src_ann_files,
+                                                   _read_many_annotations(src_ann_files)):
+                    if src_annot is None:
                         log.error("File missing for source rec: %s", src_ann_file)
                         continue
-                    pic_annotations.extend(src_annot)
+                    pic_annotations.extend((src_annot, '\n'))
 
-                # Merge all the lines together
-                pic_annotations = '\n'.join(pic_annotations)
-                # and save them in the synthetic annotation
+                # Queue the chunks for the synthetic annotation as they are, without joining
                 outfile = os.path.join(syn.compressed_pics_dir,
                                        syn.pic_prefix + "_" + str(syn_pic_id) + ".txt")
-                with open(outfile, 'w') as f:
-                    f.write(pic_annotations)
+                outputs.append((outfile, pic_annotations))
 
         # Else if not, for every picture in the synthetic file
         else:
+            # All sources need fixed labels, otherwise the synthetic is skipped
+            missing = next((src_rec for src_rec in sources if not src_rec.fixed_label_list), None)
+            if missing is not None:
+                log.info("Fixed labels were not found for recording %s in %s. Skipping recording: %s.",
+                         missing.name,
+                         missing.fixed_labels_dir,
+                         syn.name)
+                continue
             for syn_pic in syn.pic_list:
                 syn_pic_id = get_id_from_pic_name(os.path.basename(syn_pic))
                 pic_annotations = []
-                # Find the corresponding annotation of every source file
-                for src_rec in sources:
-                    if src_rec.fixed_label_list:
-                        src_dir = src_rec.fixed_labels_dir
-                    else:
-                        log.info("Fixed labels were not found for recording %s in %s. Skipping recording: %s.",
-                                 src_rec.name,
-                                 src_rec.fixed_labels_dir,
-                                 syn.name)
-                        break
-                    src_ann_file = os.path.join(src_dir, src_rec.pic_prefix + "_" + str(syn_pic_id) + ".txt")
-                    with open(src_ann_file, 'r') as f:
-                        src_annot = f.read().strip().split('\n')
-                    pic_annotations.extend(src_annot)
-                else:
-                    # Merge all the lines together
-                    pic_annotations = '\n'.join(pic_annotations)
-                    # and save them in the synthetic annotation
-                    outfile = os.path.join(syn.synthetic_annotations_dir,
-                                           syn.pic_prefix + "_" + str(syn_pic_id) + ".txt")
-                    with open(outfile, 'w') as f:
-                        f.write(pic_annotations)
-                    continue
-                break
+                # Read the corresponding annotation of every source file in one batch
+                src_ann_files = [os.path.join(src_rec.fixed_labels_dir,
+                                              src_rec.pic_prefix + "_" + str(syn_pic_id) + ".txt")
+                                 for src_rec in sources]
+                for src_ann_file, src_annot in zip(src_ann_files,
+                                                   _read_many_annotations(src_ann_files)):
+                    if src_annot is None:
+                        log.error("File missing for source rec: %s", src_ann_file)
+                        continue
+                    pic_annotations.extend((src_annot, '\n'))
+                # Queue the chunks for the synthetic annotation as they are, without joining
+                outfile = os.path.join(syn.synthetic_annotations_dir,
+                                       syn.pic_prefix + "_" + str(syn_pic_id) + ".txt")
+                outputs.append((outfile, pic_annotations))
+
+        # Flush all the queued annotation files for this synthetic
+        _write_annotation_files(outputs)
 
 
 def main():
@@ -226,11 +279,16 @@ def main():
     parser.add_argument("--mock", action="store_true", help="Only print metadata of the resulting synthetic.")
     args = parser.parse_args()
 
+    # Build the dataset once up front; worker processes forked from here inherit
+    # it copy-on-write instead of receiving a pickled copy through a queue
+    ds = Dataset(args.dataset)
+
     if args.combine_annotations:
-        combine_annotations(args.dataset, args.synthetics)
+        combine_annotations(args.dataset, args.synthetics, ds=ds)
         return
 
-    combine_recordings(args.dataset, args.from_files, args.from_properties, args.to_files, md_only=args.mock)
+    combine_recordings(args.dataset, args.from_files, args.from_properties, args.to_files, ds=ds,
+                       md_only=args.mock)
 
 
 if __name__ == '__main__':
@@ -4,8 +4,12 @@ from ._recording import *
 from ._metadata import *
 from ._utils import *
 from ._annotation import Annotation
+from ._annotation_array import AnnotationArray
 from . import constants
 from ._plotter import *
-from gen_pics import plot_recording
-from frame import Frame
-from packet import Packet
+from ._fft_fallback import samples_to_fft
+from .gen_pics import plot_recording
+from ._dynamic_quality import jpeg_dynamic_quality
+from ._fused_pixel import clip_scale_flip_stack
+from .frame import Frame
+from .packet import Packet
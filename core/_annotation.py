@@ -1,9 +1,76 @@
 """
 Definition of the annotation object
 """
+from itertools import groupby
+
+import numpy as np
+
 from . import constants
 
 
+def _clamp(value):
+    """
+    Clamps a coordinate into [0, 1]. Plain comparisons beat the min/max builtins, which box
+    their arguments, on the bulk annotation construction paths.
+    """
+    return 0.0 if value < 0.0 else (1.0 if value > 1.0 else value)
+
+
+def _merge_borders(borders, side_threshold, time_threshold):
+    """
+    Sweeps over the (left, right, up, down) borders of same-label annotations, sorted by the start of
+    transmission, and merges boxes whose sides are close enough (or overlapping) and whose time gap is below
+    the threshold. Returns the merged borders as a (M, 4) array.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    out = np.empty_like(borders)
+    count = 0
+    for idx in range(borders.shape[0]):
+        left = borders[idx, 0]
+        right = borders[idx, 1]
+        up = borders[idx, 2]
+        down = borders[idx, 3]
+        merging = True
+        while merging:
+            merging = False
+            for m_idx in range(count - 1, -1, -1):
+                m_left = out[m_idx, 0]
+                m_right = out[m_idx, 1]
+                # Check similar left and right
+                avg_width = ((right - left) + (m_right - m_left)) / 2.0
+                if (abs(m_left - left) < side_threshold * avg_width and
+                        abs(m_right - right) < side_threshold * avg_width) or \
+                        (m_left - left) * (m_right - right) < 0:
+                    # Check beginning - end (this approach also merges overlapping transmissions in the same
+                    # channel which is intended since it would be hard to separate the weaker transmission in
+                    # the picture)
+                    if up - out[m_idx, 3] < time_threshold:
+                        left = min(left, m_left)
+                        right = max(right, m_right)
+                        up = min(up, out[m_idx, 2])
+                        down = max(down, out[m_idx, 3])
+                        # Remove the merged box by shifting the tail down
+                        out[m_idx:count - 1] = out[m_idx + 1:count]
+                        count -= 1
+                        merging = True
+                        break
+        out[count, 0] = left
+        out[count, 1] = right
+        out[count, 2] = up
+        out[count, 3] = down
+        count += 1
+    return out[:count]
+
+
+try:
+    # JIT-compile the merge sweep when numba is installed for a tight loop over the float32 borders
+    from numba import njit
+    _merge_borders = njit(cache=True)(_merge_borders)
+except ImportError:
+    pass
+
+
 class Annotation(object):
     """
     Represents an instance of Annotation with information about the label and the region of the object
@@ -22,6 +89,9 @@ class Annotation(object):
     Box height
     """
 
+    # Fixed set of fields; avoids a per-instance dict for the many annotation objects in memory
+    __slots__ = ('label', 'x_c', 'y_c', 'width', 'height', 'left', 'right', 'bottom', 'up')
+
     @staticmethod
     def nrmlz(value, size):
         """
@@ -68,6 +138,21 @@ class Annotation(object):
         label, x_c, y_c, width, height = annot_str.split()
         return cls(int(label), float(x_c), float(y_c), float(width), float(height))
 
+    @classmethod
+    def _unchecked(cls, label, x_c, y_c, width, height):
+        """
+        Builds an annotation from trusted, already-clamped float coordinates, skipping the
+        casts and clamping of the regular constructor. Only for values produced internally.
+        """
+        ann = cls.__new__(cls)
+        ann.label = label
+        ann.x_c = x_c
+        ann.y_c = y_c
+        ann.width = width
+        ann.height = height
+        ann._update_borders()
+        return ann
+
     @classmethod
     def empty(cls):
         """Returns an empty/invalid annotation instance"""
@@ -79,10 +164,10 @@ class Annotation(object):
         Combines the coordinates of two annotations into a single one and returns a string representing the combined one
         """
         # Create a new annotation with the same borders as the two old ones
-        new_up = min(i.up(), j.up())
-        new_down = max(i.down(), j.down())
-        new_left = min(i.left(), j.left())
-        new_right = max(i.right(), j.right())
+        new_up = min(i.up, j.up)
+        new_down = max(i.bottom, j.bottom)
+        new_left = min(i.left, j.left)
+        new_right = max(i.right, j.right)
         new_width = new_right - new_left
         new_height = new_down - new_up
         return cls(
@@ -102,45 +187,20 @@ class Annotation(object):
         annot_list = [ann for ann in annot_list if ann.label >= 0]
 
         # Sort all the annotations based on the class index and on the start of transmission
-        annot_list.sort(key=lambda x: (x.label, x.y_c - x.height / 2.0))
-        # Iteratively merge annotations until necessary
-        while True:
-            for i in annot_list[:-1]:
-                for j in annot_list[annot_list.index(i) + 1:]:
-                    # Check same class
-                    if i.label == j.label:
-                        # Check similar left and right
-                        avg_width = (i.width + j.width) / 2
-                        if (abs(i.x_c - i.width / 2.0 - j.x_c + j.width / 2.0) <
-                            constants.SIDE_THRESHOLD[i.label] * avg_width and
-                            abs(i.x_c + i.width / 2.0 - j.x_c - j.width / 2.0) <
-                            constants.SIDE_THRESHOLD[i.label] * avg_width) or \
-                                ((i.x_c - i.width / 2.0 - j.x_c + j.width / 2.0) *
-                                 (i.x_c + i.width / 2.0 - j.x_c - j.width / 2.0)) < 0:
-                            # Check beginning - end (this approach also merges overlapping transmissions in the same
-                            # channel which is intended since it would be hard to separate the weaker transmission in
-                            # the picture)
-                            if j.y_c - j.height / 2.0 - i.y_c - i.height / 2.0 < constants.TIME_THRESHOLD[i.label]:
-                                merged = Annotation.combine_annotations(i, j)
-                                break
-                # Inner for loop else clause
-                else:
-                    continue
-                # If inner for-loop breaks, break the outer for-loop in order to reconstruct the list and start over.
-                break
-            # When no more merging is needed
-            else:
-                # Break the while-loop
-                break
-
-            # Otherwise replace the merged elements with the new one and continue the while-loop.
-            annot_list.insert(annot_list.index(i), merged)
-            # Remove both merged annotations, mind that the index of j is increased by one.
-            annot_list.remove(i)
-            annot_list.remove(j)
-            continue
-
-        return annot_list
+        annot_list.sort(key=lambda x: (x.label, x.up))
+
+        merged_list = []
+        for label, group in groupby(annot_list, key=lambda x: x.label):
+            # Columnar borders of the group, merged in a single sweep per label
+            borders = np.array([(ann.left, ann.right, ann.up, ann.bottom) for ann in group], dtype=np.float32)
+            merged = _merge_borders(borders, np.float32(constants.SIDE_THRESHOLD[label]),
+                                    np.float32(constants.TIME_THRESHOLD[label]))
+            for left, right, up, down in merged:
+                width = float(right - left)
+                height = float(down - up)
+                merged_list.append(Annotation._unchecked(label, float(left) + width / 2.0,
+                                                         float(up) + height / 2.0, width, height))
+        return merged_list
 
     @classmethod
     def compress_annotation(cls, annot, compr_factor, pic_index):
@@ -177,37 +237,28 @@ class Annotation(object):
     def __init__(self, label, x_c, y_c, width, height):
         try:
             self.label = int(label)
-            self.x_c = max(min(float(x_c), 1.0), 0.0)
-            self.y_c = max(min(float(y_c), 1.0), 0.0)
-            self.width = max(min(float(width), 1.0), 0.0)
-            self.height = max(min(float(height), 1.0), 0.0)
+            self.x_c = _clamp(float(x_c))
+            self.y_c = _clamp(float(y_c))
+            self.width = _clamp(float(width))
+            self.height = _clamp(float(height))
         except ValueError as e:
             raise e
+        self._update_borders()
 
-    # Set of helper properties to quickly check if the annotation region falls within valid numbers ([0,1])
-    @property
-    def left(self):
-        """Return the left border of the object region in the annotation"""
-        return self.x_c - self.width / 2
-
-    @property
-    def right(self):
-        """Return the right border of the object region in the annotation"""
-        return self.x_c + self.width / 2
-
-    @property
-    def bottom(self):
-        """Return the lower border of the object region in the annotation"""
-        return self.y_c + self.height / 2
-
-    @property
-    def up(self):
-        """Return the upper border of the object region in the annotation"""
-        return self.y_c - self.height / 2
+    def _update_borders(self):
+        """
+        Computes the borders of the object region ([0,1]) once, so accessing them is a plain
+        attribute read. Must be called again whenever the center or the size of the box changes.
+        """
+        self.left = self.x_c - self.width / 2
+        self.right = self.x_c + self.width / 2
+        self.bottom = self.y_c + self.height / 2
+        self.up = self.y_c - self.height / 2
 
     def shift_center(self, new_center_point):
         """Shifts the annotation to a new center point given by a tuple of (new_x_c, new_y_c)"""
         self.x_c, self.y_c = new_center_point
+        self._update_borders()
 
     def scale_annotation(self, factor, ax=None):
         """
@@ -220,6 +271,7 @@ class Annotation(object):
             self.width *= factor
         elif ax.lower() in ['y', 'h', 'height', 'both']:
             self.height *= factor
+        self._update_borders()
 
     def get_annot_str(self):
         """
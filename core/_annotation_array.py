@@ -0,0 +1,70 @@
+"""
+Columnar representation of annotations for bulk operations
+"""
+import numpy as np
+
+from ._annotation import Annotation
+
+__all__ = ['AnnotationArray']
+
+
+class AnnotationArray(object):
+    """
+    Represents a group of annotations as a single (N, 5) array with columns of
+    (label, x_c, y_c, width, height).
+
+    Bulk operations run once over the columns instead of once per Annotation object, with the
+    plain Annotation objects only materialized at the edges.
+    """
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 5)
+
+    @classmethod
+    def from_annotations(cls, annot_list):
+        """Returns an annotation array built from a list of Annotation objects"""
+        return cls([(a.label, a.x_c, a.y_c, a.width, a.height) for a in annot_list])
+
+    @property
+    def labels(self):
+        """Return the labels of all annotations as an integer array"""
+        return self.data[:, 0].astype(int)
+
+    @property
+    def lefts(self):
+        """Return the left borders of all annotation regions"""
+        return self.data[:, 1] - self.data[:, 3] / 2
+
+    @property
+    def rights(self):
+        """Return the right borders of all annotation regions"""
+        return self.data[:, 1] + self.data[:, 3] / 2
+
+    @property
+    def ups(self):
+        """Return the upper borders of all annotation regions"""
+        return self.data[:, 2] - self.data[:, 4] / 2
+
+    @property
+    def bottoms(self):
+        """Return the lower borders of all annotation regions"""
+        return self.data[:, 2] + self.data[:, 4] / 2
+
+    def compress(self, compr_factor, pic_index):
+        """
+        Return a new, compressed annotation array from a given compression factor.
+
+        Mirrors Annotation.compress_annotation but adjusts all rows in one pass: the heights are
+        compressed by the factor and the centers adjusted to reflect the vertical stacking of
+        <compr_factor> flipped pictures. Annotations compressed to one pixel or less, as well as
+        empty or invalid ones, are dropped.
+        """
+        data = self.data.copy()
+        data[:, 2] = (data[:, 2] + compr_factor - pic_index - 1) / float(compr_factor)
+        data[:, 4] /= compr_factor
+        mask = (data[:, 0] >= 0) & (data[:, 4] >= 1 / 512.0)
+        return AnnotationArray(data[mask])
+
+    def to_annotations(self):
+        """Materialize plain Annotation objects from the columns"""
+        return [Annotation(int(row[0]), row[1], row[2], row[3], row[4]) for row in self.data]
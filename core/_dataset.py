@@ -4,9 +4,12 @@ Definition of the dataset top level structure: Dataset
 import os
 import glob
 import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from ._recording import Recording
 from ._tables import DatasetTable
-from ._metadata import DatasetMetadata
+from ._metadata import DatasetMetadata, RecordingMetadata
 from ._utils import *
 
 log = logging.getLogger('spread')
@@ -58,8 +61,7 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         # Dataset metadata instance
         self.metadata = DatasetMetadata(self)
 
-        if not os.path.isdir(self.metadata_dir):
-            os.mkdir(self.metadata_dir)
+        os.makedirs(self.metadata_dir, exist_ok=True)
 
         # File naming
         self.default_rec_name_prefix = "rec_"
@@ -79,6 +81,20 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         # Dictionary containing all the recording objects
         self._recordings_dict = {}
 
+        # Cached sorted view of the recordings, rebuilt lazily after additions
+        self._recordings_sorted = None
+
+        # Inverted indexes over the recording metadata, used to filter recordings
+        # with set intersections instead of scanning every recording. The metadata
+        # index is keyed by flat (key, str(value)) tuples so a filter is a single lookup
+        self._meta_index = defaultdict(set)
+        self._classes_index = defaultdict(set)
+        self._sources_index = defaultdict(set)
+
+        # Pending recording metadata writes collected by batched_metadata, or None
+        # when writes go straight to disk
+        self._md_batch = None
+
         # Table of contents
         self.cont_table = None
 
@@ -95,10 +111,41 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         """
         Loads and initializes the recordings of this dataset
         """
-        files = glob.glob(os.path.join(self.recordings_dir, '*.32fc'))
-        for rec in files:
-            rec_obj = Recording(rec, self, recount_pictures=recount_pictures)
-            self._recordings_dict[rec_obj.name] = rec_obj
+        # Scan the recordings directory once; each DirEntry carries the stat result
+        # of its listing, so the recordings can reuse it instead of re-statting
+        try:
+            with os.scandir(self.recordings_dir) as entries:
+                entries = [e for e in entries if e.name.endswith('.32fc')]
+        except OSError:
+            entries = []
+        # Warm the metadata parse cache with one concurrent batch of sidecar reads
+        RecordingMetadata.prefetch_batch([RecordingMetadata.get_rec_metafile(entry.path) for entry in entries])
+
+        # Initialize the recordings in parallel; each Recording spends most of its
+        # time in metadata file I/O, which releases the GIL
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            recordings = executor.map(
+                lambda entry: Recording(entry.path, self, recount_pictures=recount_pictures, dir_entry=entry),
+                entries)
+            for rec_obj in recordings:
+                self._recordings_dict[rec_obj.name] = rec_obj
+                self._index_recording(rec_obj)
+
+    def _index_recording(self, rec_obj):
+        """
+        Adds a recording to the metadata indexes so it is visible to filter_recordings
+        """
+        if not rec_obj.metadata:
+            return
+        for key, value in rec_obj.metadata.metadata.items():
+            # List-valued fields are indexed under their comma-joined form, matching
+            # the representation used by older metadata files and by the filters
+            if isinstance(value, list):
+                value = ','.join(str(x) for x in value)
+            self._meta_index[(key, str(value))].add(rec_obj.name)
+        self._classes_index[len(rec_obj.metadata.sources)].add(rec_obj.name)
+        for source in rec_obj.metadata.sources:
+            self._sources_index[source].add(rec_obj.name)
 
     def add_recording(self, rec_object=None, recname=None):
         """
@@ -108,8 +155,12 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
             recfile = [os.path.join(self.recordings_dir, '%s.32fc' % recname)]
             rec_obj = Recording(recfile, self)
             self._recordings_dict[rec_obj.name] = rec_obj
+            self._index_recording(rec_obj)
         elif rec_object:
             self._recordings_dict[rec_object.name] = rec_object
+            self._index_recording(rec_object)
+        # Invalidate the cached sorted list so it gets rebuilt on next access
+        self._recordings_sorted = None
 
     def get_last_synthetic_index(self):
         """
@@ -128,9 +179,11 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
     @property
     def recordings(self):
         """
-        Returns a list of all recording objects in the dataset
+        Returns a list of all recording objects in the dataset, sorted by name and ID
         """
-        return sorted(self._recordings_dict.values(), key=lambda x: (x.name[0], x.id))
+        if self._recordings_sorted is None:
+            self._recordings_sorted = sorted(self._recordings_dict.values(), key=lambda x: (x.name[0], x.id))
+        return self._recordings_sorted
 
     @property
     def recordings_dict(self):
@@ -144,7 +197,7 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         """
         Returns a sorted list of recordings based on their name and ID
         """
-        return sorted(self._recordings_dict.values(), key=lambda x: (x.name[0], x.id))
+        return self.recordings
 
     @property
     def sorted_recording_names(self):
@@ -169,35 +222,53 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         :param filters: list of filters in the form of [key1=value1, key2=value2, ...]
         :return: list of recordings objects that satisfy all the filters
         """
-        filtered = []
-        for rec in self.recordings:
-            for fltr in filters:
+        # Parse the filters once up front; each parsed filter costs a single index lookup
+        parsed = []
+        for fltr in filters:
+            try:
+                fltr_k, fltr_v = fltr.split('=')
+            except ValueError:
+                log.error("Please make sure you are properly providing the filters in the format of key=value")
+                continue
+            parsed.append((fltr_k, fltr_v))
+
+        matched_sets = []
+        for fltr_k, fltr_v in parsed:
+            # Additional properties search
+            if fltr_k == 'classes':
                 try:
-                    fltr_k, fltr_v = fltr.split('=')
+                    fltr_v = int(fltr_v)
                 except ValueError:
-                    log.error("Please make sure you are properly providing the filters in the format of key=value")
+                    log.error("Please provide an integer to filter the number of classes.")
                     continue
-                # Additional properties search
-                if fltr_k == 'classes':
-                    try:
-                        fltr_v = int(fltr_v)
-                    except ValueError:
-                        log.error("Please provide an integer to filter the number of classes.")
-                        continue
-                    if len(rec.metadata.sources) != fltr_v:
-                        break
-                elif fltr_k == 'sources':
-                    if fltr_v not in rec.metadata.sources:
-                        break
-                # If a filter is not satisfied, discard it
-                elif str(rec.metadata.metadata.get(fltr_k, '')) != fltr_v:
-                    break
+                matched_sets.append(self._classes_index.get(fltr_v, set()))
+            elif fltr_k == 'sources':
+                matched_sets.append(self._sources_index.get(fltr_v, set()))
             else:
-                filtered.append(rec)
-                continue
-            continue
+                matched_sets.append(self._meta_index.get((fltr_k, fltr_v), set()))
+        # With no valid filters every recording matches
+        if matched_sets:
+            names = set.intersection(*matched_sets)
+        else:
+            names = self._recordings_dict.keys()
+        filtered = [self._recordings_dict[name] for name in names]
         return sorted(filtered, key=lambda x: (x.name[0], x.id))
 
+    @contextmanager
+    def batched_metadata(self):
+        """
+        Defers the recording metadata writes issued inside the block and flushes each
+        dirty metafile once on exit. Useful for batch drivers (picture generation, noise
+        calculation) that would otherwise rewrite the same JSON file per step.
+        """
+        self._md_batch = {}
+        try:
+            yield
+        finally:
+            pending, self._md_batch = self._md_batch, None
+            for md in pending.values():
+                md.store_metadata()
+
     def load_content_table(self):
         """
         Loads the table of contents
@@ -208,14 +279,15 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         """
         Returns the total size of the dataset
         """
-        return total_size([x.file_size for x in self.recordings])
+        # The totals do not depend on the ordering, so iterate the dict values directly
+        return total_size(x.file_size for x in self._recordings_dict.values())
 
     def get_total_duration(self):
         """
         Returns total duration of recordings in seconds
         """
         try:
-            return sum([int(x.metadata.duration) for x in self.recordings])
+            return sum(int(x.metadata.duration) for x in self._recordings_dict.values())
         except TypeError:
             return None
 
@@ -224,7 +296,7 @@ rec_<id>.32fc  rec_<id>.json    rec<id>/rec_<id>_pic_<pic_id>       global_metad
         Returns total amount of pictures in the dataset
         """
         try:
-            return sum([x.metadata.no_of_pictures for x in self.recordings])
+            return sum(x.metadata.no_of_pictures for x in self._recordings_dict.values())
         except TypeError:
             return None
 
@@ -0,0 +1,63 @@
+"""
+SSIM-guided JPEG quality selection
+
+Bisects the quality range for the lowest setting that still decodes above a
+target structural similarity. Meant to run once per class of visually similar
+images, with the result reused for the rest of the class.
+"""
+import io
+import numpy as np
+from PIL import Image
+
+__all__ = ['jpeg_dynamic_quality']
+
+
+def _ssim(a, b):
+    """
+    Global structural similarity between two grayscale float arrays
+    """
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    mu_a = a.mean()
+    mu_b = b.mean()
+    var_a = a.var()
+    var_b = b.var()
+    cov = ((a - mu_a) * (b - mu_b)).mean()
+    return (((2 * mu_a * mu_b + c1) * (2 * cov + c2)) /
+            ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2)))
+
+
+def _encoded_gray(im, quality, buf):
+    """
+    Round-trip the image through JPEG at the given quality and return the
+    decoded grayscale plane
+    """
+    buf.seek(0)
+    buf.truncate()
+    im.save(buf, format='JPEG', quality=quality)
+    buf.seek(0)
+    return np.asarray(Image.open(buf).convert('L'), dtype=np.float64)
+
+
+def jpeg_dynamic_quality(image, min_quality=40, max_quality=85, target_ssim=0.98):
+    """
+    Returns (quality, ssim) for the lowest JPEG quality in
+    [min_quality, max_quality] whose decoded result stays above target_ssim
+    against the input, falling back to max_quality when none does.
+    image may be a PIL image or a uint8 array.
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    ref = np.asarray(image.convert('L'), dtype=np.float64)
+    buf = io.BytesIO()
+    lo, hi = min_quality, max_quality
+    best_q, best_s = max_quality, 1.0
+    while lo <= hi:
+        q = (lo + hi) // 2
+        s = _ssim(ref, _encoded_gray(image, q, buf))
+        if s >= target_ssim:
+            best_q, best_s = q, s
+            hi = q - 1
+        else:
+            lo = q + 1
+    return best_q, best_s
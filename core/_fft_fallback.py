@@ -0,0 +1,129 @@
+"""
+Pure-python fallback for the GNU Radio FFT flowgraph (samples_fft.py)
+
+Allows regenerating the windowed FFT of a raw IQ recording on systems without a
+GNU Radio installation. When numba and rocket-fft (a numba-compatible pocketFFT
+binding) are installed, the per-block FFTs run in a compiled parallel loop;
+otherwise a vectorized numpy batch transform is used.
+"""
+import logging
+import numpy as np
+
+__all__ = ['blackmanharris', 'samples_to_fft', 'compute_spectrogram',
+           'compute_spectrogram_gpu']
+
+log = logging.getLogger('spread')
+
+try:
+    # scipy's pocketfft backend plans SIMD transforms and can thread over batches
+    from scipy import fft as _scipy_fft
+except ImportError:
+    _scipy_fft = None
+
+try:
+    # cupy routes the batched transforms through cuFFT on CUDA hosts
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def blackmanharris(nfft):
+    """
+    Returns the 4-term Blackman-Harris window used by the flowgraph, computed once
+    with numpy to avoid a scipy dependency.
+    """
+    n = np.arange(nfft)
+    x = 2.0 * np.pi * n / (nfft - 1)
+    return (0.35875 - 0.48829 * np.cos(x) + 0.14128 * np.cos(2 * x)
+            - 0.01168 * np.cos(3 * x))
+
+
+def _batched_fft(iq, win, out):
+    """
+    Windowed FFT of consecutive sample blocks into a preallocated output.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    nfft = win.shape[0]
+    for k in range(out.shape[0]):
+        out[k] = np.fft.fft(iq[k * nfft:(k + 1) * nfft] * win)
+    return out
+
+
+try:
+    # rocket-fft registers np.fft support with numba on import, letting the
+    # block loop compile and run its transforms in parallel
+    import rocket_fft                                           # noqa: F401
+    from numba import njit, prange
+
+    @njit(cache=True, parallel=True)
+    def _batched_fft(iq, win, out):                             # noqa: F811
+        nfft = win.shape[0]
+        for k in prange(out.shape[0]):
+            out[k] = np.fft.fft(iq[k * nfft:(k + 1) * nfft] * win)
+        return out
+
+    _ROCKET_FFT = True
+except ImportError:
+    _ROCKET_FFT = False
+
+
+def compute_spectrogram(samples, fft_size=512):
+    """
+    Windowed power spectrogram in dB of raw complex samples, replacing the GNU
+    Radio flowgraph for offline conversion. Batches all blocks through one FFT
+    call; with scipy installed the pocketfft backend transforms them on all cores
+    and is free to overwrite the windowed copy.
+    """
+    nblocks = int(samples.shape[0] // fft_size)
+    frames = np.array(samples[:nblocks * fft_size]).reshape(-1, fft_size)
+    frames *= blackmanharris(fft_size).astype(np.float32)
+    if _scipy_fft is not None:
+        spec = _scipy_fft.fft(frames, axis=1, workers=-1, overwrite_x=True)
+    else:
+        spec = np.fft.fft(frames, axis=1)
+    return 10.0 * np.log10(spec.real * spec.real + spec.imag * spec.imag)
+
+
+def compute_spectrogram_gpu(samples, fft_size=512, batch_blocks=8192):
+    """
+    GPU variant of compute_spectrogram: ships the sample blocks to the device in
+    batches sized to fit its memory, runs the batched FFT through cuFFT and
+    assembles the dB spectrogram on the host. Falls back to the CPU path when
+    cupy is not installed.
+    """
+    if cp is None:
+        return compute_spectrogram(samples, fft_size)
+    nblocks = int(samples.shape[0] // fft_size)
+    win_d = cp.asarray(blackmanharris(fft_size).astype(np.float32))
+    out = np.empty((nblocks, fft_size), dtype=np.float32)
+    for start in range(0, nblocks, batch_blocks):
+        stop = min(start + batch_blocks, nblocks)
+        frames_d = cp.asarray(samples[start * fft_size:stop * fft_size]).reshape(-1, fft_size)
+        frames_d *= win_d
+        spec_d = cp.fft.fft(frames_d, axis=1)
+        pwr_d = spec_d.real * spec_d.real + spec_d.imag * spec_d.imag
+        out[start:stop] = cp.asnumpy(10.0 * cp.log10(pwr_d))
+    return out
+
+
+def samples_to_fft(infile, outfile, nfft=512):
+    """
+    Reads raw complex64 IQ samples from infile, applies a Blackman-Harris window
+    per nfft-sample block, and writes the complex64 block FFTs to outfile.
+    A trailing partial block is dropped, as the flowgraph's stream-to-vector does.
+    """
+    iq = np.memmap(infile, dtype=np.complex64, mode='r')
+    nblocks = int(iq.shape[0] // nfft)
+    if nblocks < 1:
+        log.error("Not enough samples in %s for a single FFT block.", infile)
+        return None
+    win = blackmanharris(nfft).astype(np.float32)
+    if _ROCKET_FFT:
+        out = np.empty((nblocks, nfft), dtype=np.complex64)
+        _batched_fft(np.asarray(iq[:nblocks * nfft]), win, out)
+    else:
+        # One vectorized batch transform over the reshaped blocks
+        out = np.fft.fft(iq[:nblocks * nfft].reshape(nblocks, nfft) * win, axis=1)
+    out.astype(np.complex64, copy=False).tofile(outfile)
+    return outfile
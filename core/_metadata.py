@@ -7,18 +7,120 @@ DatasetMetadata
 import os
 import json
 import datetime
+import functools
 import logging
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from ._utils import *
 from . import constants
 
 from textwrap import dedent
 
+try:
+    # Streaming parser, used to keep peak memory down on oversize metafiles
+    import ijson
+except ImportError:
+    ijson = None
+
 __all__ = ['RecordingMetadata', 'DatasetMetadata']
 
 log = logging.getLogger('spread')
 
 
+# Negated per-class SNR thresholds, sorted ascending so searchsorted can place an SNR value
+# in its range with one binary search instead of a linear scan with index()
+_SNR_THRESHOLDS = {class_name: -np.asarray(thresholds, dtype=np.float64)
+                   for class_name, thresholds in constants.SNR_RANGES.items() if class_name != 'label'}
+_SNR_LABELS = constants.SNR_RANGES['label']
+
+# Metafiles above this size are parsed with the streaming parser
+_LARGE_METAFILE_BYTES = 1 << 20
+
+# Metadata info template for screen printing, dedented once at import instead of per call
+_MD_TEMPLATE = dedent("""\
+        Name of recording: %s
+        Synthetic: %s
+        Sources: %s
+        Center frequency: %s
+        Sample rate: %s
+        Duration: %s
+        Class(es): %s
+        Type: %s
+        Channel(s): %s
+        Transmission(s): %s
+        Noise level in dB: %s
+        SNR: %s
+        SNR Range(s): %s
+        Number of pictures: %s
+        """)
+
+# Sentinel distinguishing missing keys from stored falsy values
+_MISSING = object()
+
+# List-valued fields mirrored into the companion .npz sidecar of a recording
+_SIDECAR_KEYS = ('classes', 'channels', 'fc', 'samp_rate', 'snr', 'snr_range', 'sources')
+
+# Mapping of legacy metadata keys to their current names
+_RENAMED_KEYS = (
+    ("class", "classes"),
+    ("channel", "channels"),
+    ("cfreq", "fc"),
+    ("noise_pwr_db", "noise_db"),
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _load_metadata_cached(metafile, mtime):
+    """
+    Parses a metadata file once per (path, mtime) pair, so reopening the same recording does not
+    re-read and re-parse its sidecar. The mtime in the key invalidates stale entries after a
+    store. Callers must copy the returned dict before mutating it.
+
+    Oversize metafiles (synthetics aggregating many sources) are parsed incrementally with
+    ijson when available, so the raw text is never fully materialized alongside the tree.
+    """
+    if ijson and os.path.getsize(metafile) > _LARGE_METAFILE_BYTES:
+        try:
+            with open(metafile, 'rb') as mf:
+                return {key: value for key, value in ijson.kvitems(mf, '')}
+        except ijson.JSONError:
+            # Malformed file; retry below so the repair path sees the usual ValueError
+            pass
+    return load_json(metafile)
+
+
+def _safe_mtime(path):
+    """Returns the modification time of a file, or None if it cannot be statted"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _load_class_names_cached(class_names_file, mtime):
+    """Parses a class-names file once per (path, mtime) pair; missing files yield an empty dict"""
+    if mtime is None:
+        return {}
+    try:
+        return load_json(class_names_file)
+    except (IOError, OSError, ValueError):
+        log.error("Error loading the class names from %s", class_names_file)
+        return {}
+
+
+def _warm_metadata_cache(metafile):
+    """Loads one metafile into the parse cache, ignoring missing or malformed files"""
+    try:
+        _load_metadata_cached(metafile, os.path.getmtime(metafile))
+    except (OSError, ValueError):
+        pass
+
+
 class RecordingMetadata(object):
     """
     Represents an instance of recording metadata.
@@ -29,6 +131,10 @@ class RecordingMetadata(object):
     files, etc.
     """
 
+    # The fixed fields live in slots; __dict__ stays only for the cached properties,
+    # which store their results there on first access
+    __slots__ = ('_metadata', 'recording', 'metafile', '__dict__')
+
     @staticmethod
     def get_rec_metafile(recfile):
         """
@@ -44,6 +150,17 @@ class RecordingMetadata(object):
         # else:
         #     return None
 
+    @classmethod
+    def prefetch_batch(cls, metafiles):
+        """
+        Reads and parses a batch of metadata files concurrently, populating the parse cache so
+        that subsequent metadata constructions hit memory instead of the filesystem. The reads
+        are latency-bound, so overlapping them with a thread pool hides most of the wait.
+        """
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            for _ in executor.map(_warm_metadata_cache, metafiles):
+                pass
+
     @classmethod
     def combine_metadata(cls, recording, from_md):
         """
@@ -54,32 +171,37 @@ class RecordingMetadata(object):
         """
         # Initial values for the synthetic metadata
         combined = {
-            'date_recorded': datetime.datetime.now().strftime('%Y-%m-%d_%H:%M:%S'),
-            'classes': ','.join([x for y in from_md for x in y.d_class]),
+            # isoformat produces the same %Y-%m-%d_%H:%M:%S stamp without strftime's
+            # format-string interpretation on every call
+            'date_recorded': datetime.datetime.now().isoformat('_', 'seconds'),
+            'classes': [x for y in from_md for x in y.d_class],
             'noise_db': add_noise_levels([x.noise_pwr_db for x in from_md]),
             'synthetic': True,
-            'sources': ','.join([x.rec_name for x in from_md]),
+            'sources': [x.rec_name for x in from_md],
             'rec_name': recording.name,
-            'duration': min([x.duration for x in from_md]),
+            'duration': min(x.duration for x in from_md),
         }
 
-        initial_combined_keys = list(combined.keys())
+        # Keys handled above, plus per-recording bookkeeping fields that are not merged
+        skip_keys = frozenset(combined) | {'freq_sweep', 'no_of_pictures', 'file_size'}
 
+        # Collect the per-source values in buckets and join each one once at the end,
+        # instead of growing the combined strings value by value
+        buckets = defaultdict(list)
         for md in from_md:
-            for key in md.metadata:
-                if key in initial_combined_keys + ['freq_sweep', 'no_of_pictures', 'file_size']:
+            # Classes may be stored natively as a list or as a comma-joined string in old files
+            md_classes = md.metadata.get('classes', '')
+            if isinstance(md_classes, list):
+                md_classes = ','.join(md_classes)
+            for key, value in md.metadata.items():
+                if key in skip_keys:
                     continue
-
                 if key == "tx":
-                    new_value = md.metadata[key]
+                    buckets[key].append(value)
                 else:
-                    new_value = md.metadata['classes']+'_'+str(md.metadata[key])
-                # If the key already exists include the new metadata separated by commas
-                if key in combined:
-                    combined[key] += ',' + new_value
-                # Else create it
-                else:
-                    combined[key] = new_value
+                    buckets[key].append(md_classes + '_' + str(value))
+        for key, values in buckets.items():
+            combined[key] = ','.join(values)
         return cls(recording, md_from_dict=combined)
 
     def __init__(self, recording, md_from_dict=None):
@@ -95,48 +217,138 @@ class RecordingMetadata(object):
         # Metadata file
         self.metafile = RecordingMetadata.get_rec_metafile(recording.recfile)
 
-        # Parse the recording metadata to retrieve properties
-        if not self._metadata:
-            if self.metafile:
-                if os.path.isfile(self.metafile):
-                    self.load_metadata()
-
-        self.rec_name = self._gets('rec_name')
-        self._synthetic = self._getb('synthetic')
-        self.sources = self._gets('sources').split(',')
-        self.date_recorded = self._gets('date_recorded')
-        self.d_class = (self._gets('class') or self._gets('classes')).split(',')
-        self.duration = self._geti('duration')
-
-        self.channel = (self._gets('channel') or self._gets('channels')).split(',')
-        self.cfreq = (self._gets('cfreq') or self._gets('fc')).split(',')
-        self.samp_rate = self._gets('samp_rate').split(',')
-        self.noise_pwr_db = self._getf('noise_pwr_db') or self._getf('noise_db')
-        self.noise_variance = self._getf('noise_variance')
-        self.snr = self._gets('snr').split(',')
-        self._snr_range = self._gets('snr_range').split(',')
-
-        if not self._snr_range or self._snr_range == [''] or self._snr_range == ['n/a'] or \
-                ''.join(self._snr_range) == 'n/a':
-            self._set_md_value('snr_range', ','.join(self._get_snr_range()))
-            self._snr_range = self._gets('snr_range').split(',')
-
-        # If the transmission was a frequency sweep, the information is stored in this dictionary in order to be parsed
-        self.freq_sweep = self._get_md_value('freq_sweep')
-
-        self.transmission = self._gets('transmission')      # Transmission (continuous or interval)
-        self.type = self._gets('type')                      # Type of transmission(data, control, ping, n/a)
-
-        self.no_of_pictures = self._geti('no_of_pictures')
-        self.file_size = self._gets('file_size')
+        # Companion binary sidecar holding the list-valued fields as arrays
+        self.numeric_file = os.path.splitext(self.metafile)[0] + '.npz'
+
+        # Parse the recording metadata to retrieve properties; a missing metafile is
+        # handled by the loader instead of being checked with an extra stat up front
+        if not self._metadata and self.metafile:
+            self.load_metadata()
+
+    # The individual metadata fields are exposed as cached properties, parsed from the metadata
+    # dict on first access. load_metadata normalizes legacy key names before any field is
+    # hydrated, so the getters only ever consult the canonical keys. Most callers only read a couple of fields per recording, so this keeps
+    # construction down to the JSON parse itself. Assigning to a field shadows the property.
+
+    @functools.cached_property
+    def rec_name(self):
+        """Name of the recording"""
+        return self._gets('rec_name')
+
+    @functools.cached_property
+    def sources(self):
+        """Names of the source recordings for synthetic data"""
+        return self._getl('sources')
+
+    @functools.cached_property
+    def date_recorded(self):
+        """Date the recording was captured"""
+        return self._gets('date_recorded')
+
+    @functools.cached_property
+    def d_class(self):
+        """Classes of the transmissions in the recording"""
+        return self._getl('classes')
+
+    @functools.cached_property
+    def duration(self):
+        """Duration of the recording in seconds"""
+        return self._geti('duration')
+
+    @functools.cached_property
+    def channel(self):
+        """Channels of the transmissions"""
+        return self._getl('channels')
+
+    @functools.cached_property
+    def cfreq(self):
+        """Center frequencies of the transmissions"""
+        return self._getl('fc')
+
+    @functools.cached_property
+    def samp_rate(self):
+        """Sample rates of the transmissions"""
+        return self._getl('samp_rate')
+
+    @functools.cached_property
+    def noise_pwr_db(self):
+        """Noise power of the recording in dB"""
+        return self._getf('noise_db')
+
+    @functools.cached_property
+    def noise_variance(self):
+        """Variance of the recording noise"""
+        return self._getf('noise_variance')
+
+    @functools.cached_property
+    def snr(self):
+        """SNR values of the transmissions"""
+        return self._getl('snr')
+
+    @functools.cached_property
+    def freq_sweep(self):
+        """If the transmission was a frequency sweep, the information is stored in this dictionary
+        in order to be parsed"""
+        return self._get_md_value('freq_sweep')
+
+    @functools.cached_property
+    def transmission(self):
+        """Transmission (continuous or interval)"""
+        return self._gets('transmission')
+
+    @functools.cached_property
+    def type(self):
+        """Type of transmission(data, control, ping, n/a)"""
+        return self._gets('type')
+
+    @functools.cached_property
+    def no_of_pictures(self):
+        """Number of pictures generated for the recording"""
+        return self._geti('no_of_pictures')
+
+    @functools.cached_property
+    def file_size(self):
+        """Size of the recording on disk"""
+        return self._gets('file_size')
+
+    @functools.cached_property
+    def _numeric(self):
+        """
+        Arrays loaded from the companion .npz sidecar, or None for legacy recordings that only
+        carry the JSON metafile. Loading the arrays is a direct buffer read, skipping the
+        per-element text parsing of the comma-joined JSON strings.
+        """
+        try:
+            with np.load(self.numeric_file, allow_pickle=False) as npz:
+                return {key: npz[key] for key in npz.files}
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _store_numeric_sidecar(self):
+        """
+        Mirrors the list-valued fields into the companion .npz sidecar. The values keep their
+        textual form so the two representations round-trip identically.
+        """
+        arrays = {}
+        for key in _SIDECAR_KEYS:
+            raw = self._metadata.get(key)
+            if raw is None:
+                continue
+            values = raw if isinstance(raw, list) else str(raw).split(',')
+            arrays[key] = np.asarray([str(x) for x in values])
+        if arrays:
+            np.savez(self.numeric_file, **arrays)
 
     def load_metadata(self):
         """
         Parses the metafile and stores metadata in a dictionary
         """
         try:
-            with open(self.metafile, "r") as mf:
-                self._metadata = json.load(mf)
+            self._metadata = dict(_load_metadata_cached(self.metafile, os.path.getmtime(self.metafile)))
+        # No metadata file exists for this recording
+        except OSError:
+            self._metadata = {}
+            return
         # Some metadata files have an extra closing bracket when multiprocessing is used
         except ValueError:
             # Try fixing a recognized pattern
@@ -151,24 +363,27 @@ class RecordingMetadata(object):
                 log.error("Error loading metadata for recording: %s", recname)
                 self._metadata = {}
 
-        # Rename potentially old fields
-        renamed_keys = {
-            "class": "classes",
-            "channel": "channels",
-            "cfreq": "fc",
-            "noise_pwr_db": "noise_db",
-        }
-        for renamed_key in renamed_keys.keys():
-            if renamed_key in self._metadata.keys():
-                self._metadata[renamed_keys.get(renamed_key)] = self._metadata.pop(renamed_key)
+        # Rename potentially old fields with a single lookup per key
+        for old_key, new_key in _RENAMED_KEYS:
+            value = self._metadata.pop(old_key, _MISSING)
+            if value is not _MISSING:
+                self._metadata[new_key] = value
 
     def store_metadata(self):
         """
         Stores the current metadata dictionary in the metafile, overwriting the previous contents.
+
+        Inside a Dataset.batched_metadata block the write is queued instead, so batch
+        drivers flush each dirty metafile once rather than rewriting it per step.
         """
-        if self._metadata:
-            with open(self.metafile, "w") as mf:
-                json.dump(self._metadata, mf)
+        if not self._metadata:
+            return
+        dataset = getattr(self.recording, 'dataset', None)
+        if dataset is not None and getattr(dataset, '_md_batch', None) is not None:
+            dataset._md_batch[self.metafile] = self
+            return
+        dump_json(self._metadata, self.metafile)
+        self._store_numeric_sidecar()
 
     @property
     def metadata(self):
@@ -177,19 +392,26 @@ class RecordingMetadata(object):
         """
         return self._metadata
 
-    @property
+    @functools.cached_property
     def synthetic(self):
         """
         Returns True if the recording is synthetic
         """
-        return self._synthetic
+        return self._getb('synthetic')
 
-    @property
+    @functools.cached_property
     def snr_range(self):
         """
         Returns the snr range of the recording out of 'low', 'mid', 'high'.
         """
-        return self._snr_range
+        snr_range = self._getl('snr_range')
+        # Backfill the range lazily if it was never stored for this recording
+        if not snr_range or snr_range == [''] or snr_range == ['n/a'] or \
+                ''.join(snr_range) == 'n/a':
+            computed = self._get_snr_range()
+            snr_range = computed if isinstance(computed, list) else [computed]
+            self._set_md_value('snr_range', snr_range)
+        return snr_range
 
     def _get_snr_range(self):
         """
@@ -199,30 +421,35 @@ class RecordingMetadata(object):
         """
 
         # SNR ranges are defined in the constants.py
-        snr_ranges = constants.SNR_RANGES
         ret = []
-        for i in range(len(self.d_class)):
-            rec_class = self.d_class[i]
+        for rec_class, snr_str in zip(self.d_class, self.snr):
             try:
-                snr = self.snr[i].lstrip("%s_" % self.d_class[i])
-                snr = round(float(snr), 2)
+                # removeprefix drops exactly the class prefix; lstrip treated it as a
+                # character set and could eat leading digits of the value as well
+                snr = round(float(snr_str.removeprefix(rec_class + "_")), 2)
             except ValueError:
                 return 'n/a'
 
-            # For the class in question, identify the range the SNR falls into
-            for thres in snr_ranges[rec_class]:
-                if snr > thres:
-                    ret.append(snr_ranges['label'][snr_ranges[rec_class].index(thres)])
-                    break
-                continue
+            # For the class in question, identify the range the SNR falls into with a
+            # binary search over the precomputed thresholds
+            idx = int(np.searchsorted(_SNR_THRESHOLDS[rec_class], -snr, side='right'))
+            if idx < len(_SNR_LABELS):
+                ret.append(_SNR_LABELS[idx])
         return ret
 
     def _geti(self, value, default=0):
         """
         Return the metadata value as an int
         """
+        raw = self._get_raw(value, default)
+        # Fast paths for stored ints and well-formed strings, avoiding the try frame
+        if isinstance(raw, int) and not isinstance(raw, bool):
+            return raw
+        s = str(raw)
+        if s and (s[0] in '+-' or s[0].isdigit()) and s.lstrip('+-').isdigit():
+            return int(s)
         try:
-            ret_value = int(self._get_md_value(value, default))
+            ret_value = int(s)
         except ValueError:
             ret_value = default
             log.error("Error trying to load the proper value for %s. Loading default value: %s.", value, default)
@@ -242,9 +469,15 @@ class RecordingMetadata(object):
         """
         Return the metadata value as a float
         """
+        raw = self._get_raw(value, default)
+        # Numbers stored natively pass straight through without the try frame
+        if isinstance(raw, float):
+            return raw
+        if isinstance(raw, int) and not isinstance(raw, bool):
+            return float(raw)
         try:
-            ret_value = float(self._get_md_value(value, default))
-        except ValueError:
+            ret_value = float(raw)
+        except (TypeError, ValueError):
             ret_value = default
             log.error("Error trying to load the proper value for %s. Loading default value: %s.", value, default)
         return ret_value
@@ -259,6 +492,26 @@ class RecordingMetadata(object):
         ret_value = ret_value.split(',')
         return [float(x) if x else 0.0 for x in ret_value]
 
+    def _getl(self, value, alt=None, default=None):
+        """
+        Return the metadata value as a list of strings. List values are returned as stored,
+        while older metadata files that keep comma-joined strings are split for compatibility.
+        """
+        # Prefer the binary sidecar arrays when the recording has them
+        numeric = self._numeric
+        if numeric is not None:
+            for key in (value, alt):
+                if key in numeric:
+                    return [str(x) for x in numeric[key]]
+        raw = self._metadata.get(value)
+        if raw is None and alt:
+            raw = self._metadata.get(alt)
+        if raw is None:
+            return default if default is not None else ['']
+        if isinstance(raw, list):
+            return [str(x) for x in raw]
+        return str(raw).split(',')
+
     def _gets(self, value, default=''):
         """
         Return the metadata value as a string
@@ -274,7 +527,14 @@ class RecordingMetadata(object):
         """
         Return the metadata value as boolean
         """
-        return True if self._get_md_value(value, default).lower() == 'true' else False
+        raw = self._get_raw(value, default)
+        if isinstance(raw, bool):
+            return raw
+        return str(raw).lower() == 'true'
+
+    def _get_raw(self, value, default=None):
+        """Return the stored metadata value without any string coercion"""
+        return self._metadata.get(value, default)
 
     def _get_md_value(self, value, default=None):
         return str(self._metadata.get(value, default))
@@ -289,38 +549,22 @@ class RecordingMetadata(object):
         """
         Returns a string containing the metadata info for screen printing purposes
         """
-        md_str = """\
-                Name of recording: %s
-                Synthetic: %s
-                Sources: %s
-                Center frequency: %s
-                Sample rate: %s
-                Duration: %s
-                Class(es): %s
-                Type: %s
-                Channel(s): %s
-                Transmission(s): %s
-                Noise level in dB: %s
-                SNR: %s
-                SNR Range(s): %s
-                Number of pictures: %s
-                """ % (
-                        self.rec_name,
-                        self.synthetic,
-                        ','.join(self.sources),
-                        ','.join(self.cfreq),
-                        ','.join(self.samp_rate),
-                        self.duration,
-                        ','.join(self.d_class),
-                        self.type,
-                        ','.join(self.channel),
-                        self.transmission,
-                        self.noise_pwr_db,
-                        ','.join(self.snr),
-                        ','.join(self.snr_range),
-                        self.no_of_pictures
-                        )
-        return dedent(md_str)
+        return _MD_TEMPLATE % (
+                self.rec_name,
+                self.synthetic,
+                ','.join(self.sources),
+                ','.join(self.cfreq),
+                ','.join(self.samp_rate),
+                self.duration,
+                ','.join(self.d_class),
+                self.type,
+                ','.join(self.channel),
+                self.transmission,
+                self.noise_pwr_db,
+                ','.join(self.snr),
+                ','.join(self.snr_range),
+                self.no_of_pictures
+                )
 
 
 class DatasetMetadata(object):
@@ -333,8 +577,7 @@ class DatasetMetadata(object):
         self.dataset = ds
         self.ds_md_folder = os.path.join(self.dataset.root_dir, 'metadata')
 
-        if not os.path.isdir(self.ds_md_folder):
-            os.mkdir(self.ds_md_folder)
+        os.makedirs(self.ds_md_folder, exist_ok=True)
 
         self.class_names_file = os.path.join(self.ds_md_folder, "classes.json")
 
@@ -342,9 +585,13 @@ class DatasetMetadata(object):
 
     def load_class_names(self):
         """Load the dictionary containing class names and indices from the dataset metadata."""
-        if os.path.isfile(self.class_names_file):
-            with open(self.class_names_file, 'r') as cf:
-                class_dict = json.load(cf)
-        else:
-            class_dict = dict()
-        return class_dict
+        return dict(_load_class_names_cached(self.class_names_file,
+                                             _safe_mtime(self.class_names_file)))
+
+    def ds_classes(self):
+        """
+        Returns the mapping of class names to indices. Served from the mtime-keyed parse
+        cache, so repeated lookups during batch augmentation do not re-read the file.
+        """
+        self.classes = self.load_class_names()
+        return self.classes
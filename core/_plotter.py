@@ -3,9 +3,16 @@ Helper class to plot interactive images with matplotlib
 """
 from os.path import join
 import logging
+import numpy as np
 import matplotlib.pyplot as plt
 from PIL import Image
-from matplotlib.widgets import RectangleSelector
+from matplotlib.widgets import RectangleSelector, Button
+
+try:
+    # Used to resize raw arrays without a PIL round-trip
+    import cv2
+except ImportError:
+    cv2 = None
 
 
 __all__ = ['Plotter']
@@ -27,6 +34,15 @@ class Plotter(object):
         except AttributeError:
             return None
 
+    @staticmethod
+    def _resize_array(data, size):
+        """Resizes an image array, with cv2 when available to avoid converting through PIL"""
+        if cv2 is not None:
+            return cv2.resize(data, tuple(size))
+        im = Plotter._get_image_from_data(data)
+        # Bilinear matches cv2's default and hits the SIMD path of Pillow-SIMD
+        return np.asarray(im.resize(size, Image.BILINEAR)) if im else None
+
     @staticmethod
     def onkeypress(event):
         """Experimental function to test key press"""
@@ -44,6 +60,13 @@ class Plotter(object):
 
         self.selected_areas = None
 
+        # Rectangle selector and its key handler, reused across plots on the same axes
+        self._selector = None
+        self._key_cid = None
+
+        # References to created buttons, kept so the widgets stay responsive
+        self._buttons = []
+
     def area_borders(self):
         """Return the borders of the selected area"""
         left = int(min(self.selected_areas[0], self.selected_areas[2]))
@@ -64,10 +87,21 @@ class Plotter(object):
         Plot function either plots in a given subplot and returns the subplot or saves the image to a file.
         """
 
+        # Matplotlib renders the raw array directly, so the PIL image is only built
+        # for the pillow show and file save paths
+        if im is None and data is not None and subplot is not None and subplot != "pillow":
+            if resize:
+                data = Plotter._resize_array(data, resize)
+            if data is not None:
+                self._plot(data, subplot, options)
+                return
+            log.error("Nothing to plot.")
+            return None
+
         im = im if im else Plotter._get_image_from_data(data)
 
         if resize:
-            im = im.resize(resize)
+            im = im.resize(resize, Image.BILINEAR)
 
         if not im:
             log.error("Nothing to plot.")
@@ -92,11 +126,19 @@ class Plotter(object):
             subplot.imshow(im)
             if options:
                 if options.get('noise_input', None):
-                    Plotter.toggle_selector.RS = RectangleSelector(
-                        subplot, self._line_select_callback, useblit=True, button=[1], minspanx=5,
-                        minspany=5, spancoords='pixels', interactive=True
-                    )
-                    noise_box = plt.connect('key_press_event', Plotter.toggle_selector)
+                    # Reuse the selector across frames and only rebuild it when the
+                    # target axes changes, instead of piling up selectors and handlers
+                    if self._selector is None or self._selector.ax is not subplot:
+                        if self._key_cid is not None:
+                            plt.disconnect(self._key_cid)
+                        self._selector = RectangleSelector(
+                            subplot, self._line_select_callback, useblit=True, button=[1], minspanx=5,
+                            minspany=5, spancoords='pixels', interactive=True
+                        )
+                        Plotter.toggle_selector.RS = self._selector
+                        self._key_cid = plt.connect('key_press_event', Plotter.toggle_selector)
+                    else:
+                        self._selector.set_active(True)
 
                 if options.get('button', None):
                     # Expect a list of dict for buttons
@@ -106,7 +148,11 @@ class Plotter(object):
                         # Button position as in [left, bottom, width, height]
                         btn_position = btn.get('position', None)
 
-                        btn_action = btn.get('action')()
+                        if btn_position:
+                            # Bind the action as the click callback rather than calling it at setup
+                            button = Button(plt.axes(btn_position), btn_label)
+                            button.on_clicked(btn.get('action'))
+                            self._buttons.append(button)
 
             plt.show()
         pass
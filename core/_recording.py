@@ -3,33 +3,114 @@ Recording class and related functionalities to support the recording object of t
 """
 import os
 import sys
-import glob
-import subprocess
+import shutil
 import json
 import time
 import logging
 import numpy as np
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 from argparse import Namespace
 from matplotlib import pyplot as plt
 
 try:
     from . import flowgraphs
-except SyntaxError:
-    raise Exception("Flowgraphs cannot be imported. Please try with Python2.7.")
+except (SyntaxError, ImportError):
+    # The flowgraph scripts are Python-2.7 GNU Radio code and cannot load on
+    # py3 interpreters; the rest of the package does not need them, so degrade
+    # here and only error where a flowgraph is actually invoked
+    flowgraphs = None
 
+from . import _fft_fallback as fft_fallback
 from . import _metadata as metadata
 from . import _utils as utils
 from . import _annotation as annotation
 from ._plotter import Plotter
 from ._annotation import Annotation
-from gen_pics import plot_recording
+from ._annotation_array import AnnotationArray
+from .gen_pics import plot_recording
 
 __all__ = ['Recording']
 
 log = logging.getLogger('spread')
 
 
+def _require_flowgraphs():
+    """
+    Raises when the py2-only GNU Radio flowgraph scripts could not be imported
+    """
+    if flowgraphs is None:
+        raise Exception("Flowgraphs cannot be imported. Please try with Python2.7.")
+
+# Shared random generator; the Generator API is measurably faster than the legacy
+# np.random functions and can produce float32 samples directly
+_rng = np.random.default_rng()
+
+
+def _noise_background(sigma, shape):
+    """Synthesizes a zero-mean Gaussian noise background in float32"""
+    noise = _rng.standard_normal(shape, dtype=np.float32)
+    noise *= np.float32(sigma)
+    return noise
+
+
+def _patch_scale_flip(noise_array, mold, t_start, f_start, lo, hi, out):
+    """
+    Renders the noise background with the mold patched in at (t_start, f_start) into out as
+    a flipped 8-bit image, fusing the patch, clip and scale steps into one pass.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    rows = noise_array.shape[0]
+    cols = noise_array.shape[1]
+    m_rows = mold.shape[0]
+    m_cols = mold.shape[1]
+    scale = 255.0 / (hi - lo)
+    for i in range(rows):
+        in_mold_rows = t_start <= i < t_start + m_rows
+        for j in range(cols):
+            if in_mold_rows and f_start <= j < f_start + m_cols:
+                val = mold[i - t_start, j - f_start]
+            else:
+                val = noise_array[i, j]
+            if val < lo:
+                val = lo
+            elif val > hi:
+                val = hi
+            out[rows - 1 - i, j] = np.uint8((val - lo) * scale)
+    return out
+
+
+try:
+    # JIT-compile the render kernel for a tight loop over the image; without numba the
+    # vectorized buffer-reuse path below is used instead
+    from numba import njit
+    _patch_scale_flip = njit(cache=True, fastmath=True)(_patch_scale_flip)
+    _NUMBA_KERNELS = True
+except ImportError:
+    _NUMBA_KERNELS = False
+
+
+def _render_grayscale_image(dat_file, img_index, npoints=0, nfft=512, greyscale_avg=1, min_snr=-10,
+                            max_snr=50, pic_prefix='', outdir='', resize=None):
+    """
+    Renders a single grayscale picture from the SNR file. Kept at module level so it can run
+    in a worker process; each worker opens its own read-only mapping of the file.
+    """
+    dat_mm = utils.mmap_samples(dat_file)
+    data = dat_mm[img_index * npoints:(img_index + 1) * npoints].reshape(-1, nfft)
+    if greyscale_avg > 1:
+        nrows = (data.shape[0] // greyscale_avg) * greyscale_avg
+        avg_data = data[:nrows].reshape(nrows // greyscale_avg, greyscale_avg, data.shape[1]).mean(axis=1)
+    else:
+        avg_data = np.array(data)
+    avg_data = utils.clip_scale_flip(avg_data, min_snr, max_snr, out=avg_data)
+    Plotter().plot(data=avg_data, outfile="%s_%d.jpg" % (pic_prefix, img_index), figdir=outdir,
+                   resize=resize)
+
+
 class Recording(object):
     """
     Represents a recording of the dataset with data parsed from the recording and its metadata
@@ -37,13 +118,28 @@ class Recording(object):
 
     heuristic_noise_calculation = 5.568650501352949 ** 2
 
+    @staticmethod
+    def _parse_recfile(recfile):
+        """
+        Resolves a recording path into (absolute path, name, extension, id) in a single
+        pass, so the constructor and the name helpers do not each redo the abspath and
+        splitext work.
+        """
+        abs_path = os.path.abspath(recfile)
+        name, ext = os.path.splitext(os.path.basename(abs_path))
+        try:
+            rec_id = int(name.rsplit('_', 1)[-1])
+        except ValueError:
+            rec_id = -1
+        return abs_path, name, ext, rec_id
+
     @staticmethod
     def get_rec_id(name):
         """
         Returns the id of the recording when the name format is rec_*
         """
         try:
-            return int(name.split('_')[-1])
+            return int(name.rsplit('_', 1)[-1])
         except ValueError:
             return -1
 
@@ -55,8 +151,7 @@ class Recording(object):
         :param recfile: path to recording file
         :return: recording name
         """
-        recfile = os.path.abspath(recfile)
-        return os.path.splitext(os.path.basename(recfile))[0]
+        return Recording._parse_recfile(recfile)[1]
 
     @staticmethod
     def get_rectype(recfile):
@@ -65,8 +160,7 @@ class Recording(object):
         :param recfile: path to recording file
         :return: recording type
         """
-        recfile = os.path.abspath(recfile)
-        return os.path.splitext(os.path.basename(recfile))[1]
+        return Recording._parse_recfile(recfile)[2]
 
     @classmethod
     def merge_recordings(cls, rec_objects, outfile=None, mockup=False):
@@ -98,6 +192,7 @@ class Recording(object):
                     ow.write("")
             else:
                 # Use the appropriate GNUradio script to combine the recordings
+                _require_flowgraphs()
                 flowgraph_dict = {
                     2: flowgraphs.merge2recordings.main,
                     3: flowgraphs.merge3recordings.main,
@@ -125,26 +220,25 @@ class Recording(object):
             # Initialize  the recording
             return cls(outfile, rec_objects[0].dataset, no_md=True)
 
-    def __init__(self, recfile, dataset, no_md=False, recount_pictures=False):
+    def __init__(self, recfile, dataset, no_md=False, recount_pictures=False, dir_entry=None):
 
         # Dataset istance that the recording is member of
         self.dataset = dataset
 
+        # Cached stat result from the directory scan that found the recording,
+        # used to avoid re-statting the file when computing its size
+        self._stat = dir_entry.stat() if dir_entry is not None else None
+
         self.plotter = None
 
-        # Recording files and names
-        # Absolute recording file path
-        self.recfile = os.path.abspath(recfile)
+        # Recording files and names, parsed from the path in a single pass:
+        # absolute file path, name with no extension (eg: rec_43) and id (eg: 43)
+        self.recfile, self.name, _, self.id = Recording._parse_recfile(recfile)
 
         # File descriptor of recording file, used to read chunks of data when processing
         # Should be closed after operation.
         self.file_descriptor = None
 
-        # Name of the recording with no extension (eg: rec_43)
-        self.name = Recording.get_recname(recfile)
-        # Id of recording (eg: 43)
-        self.id = Recording.get_rec_id(self.name)
-
         # Directory for files needed for noise calculation (fft samples, SNR values, pics, etc)
         self.noise_calc_dir = os.path.join(self.dataset.noise_calc_dir, self.name)
         # SNR values file and fft samples file
@@ -167,6 +261,10 @@ class Recording(object):
         self._pic_list = None
         self._compr_pic_list = None
 
+        # Directory listing cache keyed by (dir, prefix, suffix), holding (dir mtime,
+        # file list) pairs so unchanged directories are not rescanned on repeated accesses
+        self._glob_cache = {}
+
         if no_md:
             self.metadata = None
         else:
@@ -177,50 +275,107 @@ class Recording(object):
             self.metadata._metadata['no_of_pictures'] = self.metadata.no_of_pictures
             self.metadata.store_metadata()
 
+    @staticmethod
+    def _scan_sorted(dirpath, prefix, suffix, ordered=True):
+        """
+        Lists the files in a directory whose names match a prefix and suffix, sorted by the
+        trailing picture id. A single os.scandir pass replaces glob's fnmatch-per-entry walk,
+        and the id is parsed once per entry instead of once more inside the sort key.
+
+        Callers that do not care about the ordering can pass ordered=False to skip the id
+        parsing and the sort altogether.
+        """
+        plen = len(prefix)
+        slen = len(suffix)
+        entries = []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    name = entry.name
+                    if not (name.startswith(prefix) and name.endswith(suffix)):
+                        continue
+                    if not ordered:
+                        entries.append(entry.path)
+                        continue
+                    # With the fixed per-recording prefix stripped, the remainder is
+                    # normally just the id digits; only fall back to the generic
+                    # split/grsc handling when it is not
+                    pic_id = name[plen:-slen]
+                    if pic_id.isdigit():
+                        entries.append((int(pic_id), entry.path))
+                        continue
+                    pic_id = pic_id.split('_')[-1]
+                    if 'grsc' in pic_id:
+                        pic_id = pic_id.replace('grsc', '')
+                    try:
+                        pic_id = int(pic_id)
+                    except ValueError:
+                        pic_id = -1
+                    entries.append((pic_id, entry.path))
+        except FileNotFoundError:
+            # Directory does not exist (yet), nothing to list
+            return []
+        if not ordered:
+            return entries
+        entries.sort()
+        return [path for _, path in entries]
+
+    def _cached_scan(self, dirpath, prefix, suffix, ordered=True):
+        """
+        Serves _scan_sorted results from the listing cache while the directory mtime is
+        unchanged, so repeated property accesses do not rescan the disk
+        """
+        try:
+            dir_mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return []
+        key = (dirpath, prefix, suffix)
+        cached = self._glob_cache.get(key)
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+        files = Recording._scan_sorted(dirpath, prefix, suffix, ordered=ordered)
+        if ordered:
+            # Unordered listings are not cached so an ordered caller never sees them
+            self._glob_cache[key] = (dir_mtime, files)
+        return files
+
     def _get_annot_list(self):
         """Get a list of annotations generated in the picture directory"""
-        ann_pattern = os.path.join(self.rec_pics_dir, '%s_*.txt' % self.pic_prefix)
-        return sorted(glob.glob(ann_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.rec_pics_dir, self.pic_prefix + '_', '.txt')
 
     def _get_synth_annot_list(self):
         """Get a list of synthetic annotations generated for synthetic recordings"""
-        ann_pattern = os.path.join(self.synthetic_annotations_dir, '%s_*.txt' % self.pic_prefix)
-        return sorted(glob.glob(ann_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.synthetic_annotations_dir, self.pic_prefix + '_', '.txt')
 
     def _get_corr_annot_list(self):
         """Get a list of corrected annotations, if available"""
-        ann_pattern = os.path.join(self.corrected_annotations_dir, '%s_*.txt' % self.pic_prefix)
-        return sorted(glob.glob(ann_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.corrected_annotations_dir, self.pic_prefix + '_', '.txt')
 
     def _get_fixed_label_list(self):
         """Get a list of manually fixed labels"""
-        ann_pattern = os.path.join(self.fixed_labels_dir, '%s_*.txt' % self.pic_prefix)
-        return sorted(glob.glob(ann_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.fixed_labels_dir, self.pic_prefix + '_', '.txt')
 
     def _get_compr_annot_list(self):
         """Get a list of compressed annotations generated in the compressed picture directory"""
-        ann_pattern = os.path.join(self.compressed_pics_dir, '%s_*.txt' % self.pic_prefix)
-        return sorted(glob.glob(ann_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.compressed_pics_dir, self.pic_prefix + '_', '.txt')
 
-    def _get_pic_list(self, prefix=''):
+    def _get_pic_list(self, prefix='', ordered=True):
         """
         Gets the pictures generated for the recording
         """
-        pic_pattern = os.path.join(self.rec_pics_dir, prefix + '*.jpg')
-        return sorted(glob.glob(pic_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.rec_pics_dir, prefix, '.jpg', ordered=ordered)
 
-    def _get_compr_pic_list(self, prefix=''):
+    def _get_compr_pic_list(self, prefix='', ordered=True):
         """
         Gets the compressed pictures generated for the recording
         """
-        pic_pattern = os.path.join(self.compressed_pics_dir, prefix + '*.jpg')
-        return sorted(glob.glob(pic_pattern), key=lambda x: int(utils.get_id_from_pic_name(os.path.basename(x))))
+        return self._cached_scan(self.compressed_pics_dir, prefix, '.jpg', ordered=ordered)
 
     def _get_file_size(self):
         """
         Calculates the disk space occupied by this recording, including the pictures generated by it
         """
-        bytes_size = os.path.getsize(self.recfile)
+        bytes_size = self._stat.st_size if self._stat is not None else os.path.getsize(self.recfile)
         try:
             bytes_size += os.path.getsize(self.rec_pics_dir)
         except OSError:
@@ -228,44 +383,66 @@ class Recording(object):
             pass
         return utils.convert_size(bytes_size)
 
+    @staticmethod
+    def _count_files(dirpath, suffix):
+        """Counts the files in a directory with a given suffix, without listing or sorting them"""
+        try:
+            with os.scandir(dirpath) as it:
+                return sum(1 for entry in it if entry.name.endswith(suffix))
+        except FileNotFoundError:
+            return 0
+
     def _count_all_pictures(self):
         """
         Counts all pictures associated with this recording
         """
-        return len(self.compressed_pic_list) + len(self.pic_list)
+        # Only the counts are needed here, so skip building the sorted lists
+        return (Recording._count_files(self.compressed_pics_dir, '.jpg') +
+                Recording._count_files(self.rec_pics_dir, '.jpg'))
+
+    def _invalidate_lists(self, *attrs):
+        """
+        Clears the given list caches along with the directory listings backing them, so the
+        next property access rescans the disk instead of serving paths that a mutation
+        (picture removal, annotation compression) may have deleted or added
+        """
+        for attr in attrs:
+            setattr(self, attr, None)
+        self._glob_cache.clear()
 
     @property
     def pic_list(self):
         """Returns a list of the generated pictures for the recording"""
-        if not self._pic_list:
+        # Compare against None so an empty directory does not trigger a re-glob on every access
+        if self._pic_list is None:
             self._pic_list = self._get_pic_list()
         return self._pic_list
 
     @property
     def annotation_list(self):
         """Returns a list of annotation files (absolute paths) located in the picture directory of the recording"""
-        if not self._annotation_list:
+        if self._annotation_list is None:
             self._annotation_list = self._get_annot_list()
         return self._annotation_list
 
     @property
     def synth_annotation_list(self):
         """Returns a list of synthetic annotation files (absolute paths)"""
-        if not self._synth_annotation_list:
+        if self._synth_annotation_list is None:
             self._synth_annotation_list = self._get_synth_annot_list()
         return self._synth_annotation_list
 
     @property
     def corrected_annotation_list(self):
         """Return a list of corrected annotations"""
-        if not self._corrected_annotation_list:
+        if self._corrected_annotation_list is None:
             self._corrected_annotation_list = self._get_corr_annot_list()
         return self._corrected_annotation_list
 
     @property
     def fixed_label_list(self):
         """Return list of manually fixed labels"""
-        if not self._fixed_label_list:
+        if self._fixed_label_list is None:
             self._fixed_label_list = self._get_fixed_label_list()
         return self._fixed_label_list
 
@@ -275,7 +452,8 @@ class Recording(object):
         Returns a list of compressed annotation files (absolute paths) located in the compressed picture directory of
         the recording
         """
-        if not self._compr_annotation_list:
+        # Compare against None so an empty directory does not trigger a re-glob on every access
+        if self._compr_annotation_list is None:
             self._compr_annotation_list = self._get_compr_annot_list()
         return self._compr_annotation_list
 
@@ -285,7 +463,7 @@ class Recording(object):
         Returns a list of compressed picture files (absolute paths) located in the compressed picture directory of
         the recording
         """
-        if not self._compr_pic_list:
+        if self._compr_pic_list is None:
             self._compr_pic_list = self._get_compr_pic_list()
         return self._compr_pic_list
 
@@ -303,6 +481,7 @@ class Recording(object):
         Loads the complex samples and previews them with GNUradio
         """
         log.info("Playing recording %s.", self.name)
+        _require_flowgraphs()
         flowgraphs.view_samples_from_file.main(options=Namespace(filename=self.recfile, freq=2.44e9,
                                                                  refresh_rate=30, samp_rate=100e6,
                                                                  fft_size=512))
@@ -322,9 +501,9 @@ class Recording(object):
                 noise_pwr_db = -50  # -50 is a reasonable starting point for noise level
 
         # Create the directory if needed
-        if not os.path.isdir(self.noise_calc_dir):
-            os.makedirs(self.noise_calc_dir)
+        os.makedirs(self.noise_calc_dir, exist_ok=True)
 
+        _require_flowgraphs()
         flowgraphs.samples_to_dat.main(options=Namespace(filename=self.recfile,
                                                          output=os.path.splitext(self.dat_file)[0],
                                                          noise_pwr_db=noise_pwr_db, fft_size=fft_size))
@@ -334,9 +513,12 @@ class Recording(object):
         Generates the fft samples
         """
         # Create the directory if needed
-        if not os.path.isdir(self.noise_calc_dir):
-            os.makedirs(self.noise_calc_dir)
+        os.makedirs(self.noise_calc_dir, exist_ok=True)
 
+        if flowgraphs is None:
+            # Pure-python fallback for systems without GNU Radio
+            fft_fallback.samples_to_fft(self.recfile, self.fft_file, nfft=fft_size)
+            return
         flowgraphs.samples_fft.main(options=Namespace(filename=self.recfile, output=os.path.splitext(self.fft_file)[0],
                                                       fft_size=fft_size))
 
@@ -362,8 +544,11 @@ class Recording(object):
         """
         Deletes all pictures and noise calculations of the recording
         """
-        cmd = "rm -r %s %s" % (self.noise_calc_dir, self.rec_pics_dir)
-        subprocess.call(cmd.split())
+        # Remove the trees in-process instead of forking an rm per recording
+        shutil.rmtree(self.noise_calc_dir, ignore_errors=True)
+        shutil.rmtree(self.rec_pics_dir, ignore_errors=True)
+        self._invalidate_lists('_pic_list', '_compr_pic_list', '_annotation_list', '_synth_annotation_list',
+                               '_corrected_annotation_list', '_fixed_label_list', '_compr_annotation_list')
 
     def create_artificial_data(self, mold=None, freq_steps=None, time_steps=None, prefix=None, figdir=None, label=None):
         """
@@ -396,7 +581,8 @@ class Recording(object):
                 # otherwise look for the dataset classes to find the corresponding index
                 label_index = self.dataset.metadata.ds_classes().get(label.upper(), None)
 
-            if not label_index:
+            # Compare against None explicitly; class index 0 is a valid label
+            if label_index is None:
                 log.error("Label not found in the dataset classes. Please update the file %s to include the desired"
                           "label or provide a label index directly for a new class.",
                           self.dataset.metadata.class_names_file)
@@ -409,29 +595,32 @@ class Recording(object):
             log.info("Please draw a region in the following picture to identify mold")
 
             npoints = 512 * 512
-            nbytes = npoints * 4
 
             # Preview the first 10 images for the user to pick a mold region
             img_index = 0
+            # One figure and one plotter reused across the preview frames; the plotter
+            # keeps its rectangle selector bound to the axes instead of rebuilding the
+            # widgets and their event handlers per image
+            fig, subplot = plt.subplots()
+            pltr = Plotter()
             with open(self.dat_file, 'rb') as df:
                 while True:
                     if img_index > 9:
                         break
-                    data = utils.load_bytes_from_fd(df, img_index * nbytes, (img_index + 1) * nbytes)
+                    # One buffered read straight into a float32 array, instead of a
+                    # seek + read + struct.unpack round-trip per chunk
+                    data = np.fromfile(df, dtype=np.float32, count=npoints)
 
-                    if not data:  # No more data to unpack
+                    if data.size < npoints:  # No more data to unpack
                         break
 
-                    data = utils.data_reshape(data, -1, 512)
+                    data = data.reshape(-1, 512)
 
-                    # Process the data before creating the image, create a copy to keep original intact
-                    img_data = utils.data_clip(np.copy(data), -10, 50)
-                    img_data = utils.img_scale(img_data, -10, 50)
-                    img_data = utils.img_flip(img_data)
+                    # Process the data in one fused pass; the original stays intact for the mold crop
+                    img_data = utils.clip_scale_flip(data, -10, 50)
 
-                    subplot = plt.subplot()
+                    subplot.clear()
 
-                    pltr = Plotter()
                     pltr.plot(data=img_data, subplot=subplot, options={'noise_input': True})
 
                     # If input area was given, break
@@ -444,10 +633,13 @@ class Recording(object):
                         mold = data[up:bottom, left:right]
                         break
 
-        # Create a background noise array for the artificial data
-        mu = log_noise
+                    img_index += 1
+            plt.close(fig)
+
+        # Create a background noise array for the artificial data; the background is
+        # zero-mean since the noise floor itself is subtracted out of the pictures
         sigma = float(noise_variance) ** 0.5
-        noise_array = np.random.normal(mu - log_noise, sigma, (512, 512))
+        noise_array = _noise_background(sigma, (512, 512))
 
         # Prepare the prefix and save directories
         if not prefix:
@@ -456,8 +648,7 @@ class Recording(object):
         if not figdir:
             figdir = os.path.join('.', '%s_artificial_data' % self.name)
 
-        if not os.path.isdir(figdir):
-            os.makedirs(figdir)
+        os.makedirs(figdir, exist_ok=True)
 
         # Prepare the annotations to be augmented along with the data
         if label:
@@ -473,33 +664,57 @@ class Recording(object):
                 log.error("There was an error creating the original annotation. Exiting.")
                 return
 
+        # Clip the noise background and the mold once up front, so the patched buffer
+        # needs no per-image clipping pass
+        noise_array = utils.data_clip(noise_array, -10, 50)
+        mold = utils.data_clip(np.copy(mold).astype(np.float32, copy=False), -10, 50)
+
+        # Reusable image buffer: instead of copying the full noise background for every
+        # step, only the rectangle patched in the previous iteration is restored
+        artif_arr = noise_array.copy()
+        # Scratch buffers for the fused render passes, reused across images
+        scale_buf = np.empty_like(artif_arr)
+        img_buf = np.empty(noise_array.shape, dtype=np.uint8)
+        prev_region = None
+
+        # One plotter reused for every saved image; the save path keeps no per-image state
+        pltr = Plotter()
+
         img_index = 0
         for tstep in time_steps:
 
             # Printed (saved) image is actually flipped over the time axes to better illustrate the flow of packets over
             # time. Thus, input time steps must also be corrected to follow the flipped orientation of the image.
             tstep = 512 - tstep
-            t_start = tstep - mold.shape[0] / 2
+            # Integer division: these are slice bounds and a float index raises on py3
+            t_start = tstep - mold.shape[0] // 2
             t_end = t_start + mold.shape[0]
             for fstep in freq_steps:
-                f_start = fstep - mold.shape[1] / 2
+                f_start = fstep - mold.shape[1] // 2
                 f_end = f_start + mold.shape[1]
 
-                artif_arr = np.copy(noise_array)
-                try:
-                    artif_arr[t_start:t_end, f_start:f_end] = mold
-                except ValueError:
+                if t_start < 0 or t_end > noise_array.shape[0] or f_start < 0 or f_end > noise_array.shape[1]:
                     log.error("There was an error patching the requested region at the position with:\n"
                               "Center: (%s, %s).\n Make sure the region can fit in the image. Skipping...",
                               fstep, tstep)
                     continue
-                img_name = "%s_%d.jpg" % (prefix, img_index)
 
-                artif_arr = utils.data_clip(artif_arr, -10, 50)
-                artif_arr = utils.img_flip(utils.img_scale(artif_arr, -10, 50))
+                if _NUMBA_KERNELS:
+                    # One compiled pass: patch, clip, scale and flip straight into the
+                    # 8-bit buffer, without touching the background between steps
+                    img_arr = _patch_scale_flip(noise_array, mold, t_start, f_start,
+                                                np.float32(-10.0), np.float32(50.0), img_buf)
+                else:
+                    if prev_region is not None:
+                        prev_t0, prev_t1, prev_f0, prev_f1 = prev_region
+                        artif_arr[prev_t0:prev_t1, prev_f0:prev_f1] = noise_array[prev_t0:prev_t1, prev_f0:prev_f1]
+                    artif_arr[t_start:t_end, f_start:f_end] = mold
+                    prev_region = (t_start, t_end, f_start, f_end)
+                    img_arr = utils.clip_scale_flip(artif_arr, -10, 50, out=scale_buf)
+
+                img_name = "%s_%d.jpg" % (prefix, img_index)
 
-                pltr = Plotter()
-                pltr.plot(data=artif_arr, outfile=img_name, figdir=figdir)
+                pltr.plot(data=img_arr, outfile=img_name, figdir=figdir)
 
                 # Shift annotation accordingly and save to file
                 if label:
@@ -528,30 +743,33 @@ class Recording(object):
         self.gen_dat_file(noise_pwr_db=-50)
 
         npoints = 512 * 512
-        nbytes = npoints * 4
 
         # Preview the first 10 images for the user to pick a noise region
         log_noise = None
         img_index = 0
+        # One figure and one plotter reused across the preview frames; the plotter
+        # keeps its rectangle selector bound to the axes instead of rebuilding the
+        # widgets and their event handlers per image
+        fig, subplot = plt.subplots()
+        pltr = Plotter()
         with open(self.dat_file, 'rb') as df:
             while True:
                 if img_index > 9:
                     break
-                data = utils.load_bytes_from_fd(df, img_index * nbytes, (img_index + 1) * nbytes)
+                # One buffered read straight into a float32 array, instead of a
+                # seek + read + struct.unpack round-trip per chunk
+                data = np.fromfile(df, dtype=np.float32, count=npoints)
 
-                if not data:  # No more data to unpack
+                if data.size < npoints:  # No more data to unpack
                     break
 
-                data = utils.data_reshape(data, -1, 512)
+                data = data.reshape(-1, 512)
 
-                # Process the data before creating the image, create a copy to keep original intact
-                img_data = utils.data_clip(np.copy(data), -10, 50)
-                img_data = utils.img_scale(img_data, -10, 50)
-                img_data = utils.img_flip(img_data)
+                # Process the data in one fused pass; the original stays intact for the SNR crop
+                img_data = utils.clip_scale_flip(data, -10, 50)
 
-                subplot = plt.subplot()
+                subplot.clear()
 
-                pltr = Plotter()
                 pltr.plot(data=img_data, subplot=subplot, options={'noise_input': True})
 
                 # If input area was given, break
@@ -575,6 +793,7 @@ class Recording(object):
                     break
 
                 img_index += 1
+        plt.close(fig)
         return log_noise, noise_variance
 
     def compress_annotations(self, compr_factor, merge=True):
@@ -588,22 +807,24 @@ class Recording(object):
         if not to_compress:
             log.info("No corrected labels found for recording %s. Nothing to compress...", self.name)
             return
-        if not os.path.isdir(self.compressed_pics_dir):
-            os.mkdir(self.compressed_pics_dir)
+        os.makedirs(self.compressed_pics_dir, exist_ok=True)
 
         compressed_pic_annotations = []
 
-        # Fetch all original annotations for every picture
-        for pic_ann in to_compress:
-            new_pic_index = to_compress.index(pic_ann) / compr_factor
-            pic_index = to_compress.index(pic_ann) % compr_factor
+        # Output naming, hoisted out of the loop
+        compr_ann_prefix = os.path.join(self.compressed_pics_dir, self.pic_prefix + "_")
+
+        # Fetch all original annotations for every picture; the index of each annotation
+        # in the list determines its compressed picture and its slot within it
+        for i, pic_ann in enumerate(to_compress):
+            new_pic_index = i // compr_factor
+            pic_index = i % compr_factor
             with open(pic_ann, 'r') as orig_ann:
                 pic_annotations = orig_ann.read().strip().split('\n')
 
             extend_annot = [annotation.Annotation.get_annotation_from_str(x) for x in pic_annotations]
-            extend_annot = [annotation.Annotation.compress_annotation(x, compr_factor, pic_index) for x in
-                            extend_annot]
-            compressed_pic_annotations.extend(extend_annot)
+            extend_annot = AnnotationArray.from_annotations(extend_annot).compress(compr_factor, pic_index)
+            compressed_pic_annotations.extend(extend_annot.to_annotations())
 
             # Save the compressed annotation
             if pic_index == compr_factor - 1:
@@ -611,18 +832,22 @@ class Recording(object):
                     compressed_pic_annotations = annotation.Annotation.merge_annotations(compressed_pic_annotations)
                 compressed_pic_annotations = '\n'.join([x.get_annot_str() for x in compressed_pic_annotations
                                                         if x.get_annot_str()])
-                compressed_ann_file = os.path.join(self.compressed_pics_dir,
-                                                   self.pic_prefix + "_" + str(new_pic_index) + ".txt")
+                compressed_ann_file = compr_ann_prefix + str(new_pic_index) + ".txt"
                 with open(compressed_ann_file, 'w') as comp_ann:
                     comp_ann.write(compressed_pic_annotations)
                 compressed_pic_annotations = []
 
+        self._invalidate_lists('_compr_annotation_list', '_compr_pic_list')
         log.info("Compressed annotations for recording %s were saved in: %s", self.name, self.compressed_pics_dir)
 
     def generate_pictures(self, log_noise=None, nfft=512, nlines=512, navg=3, nproc=4, npics=0, pic_prefix=None,
-                          mode='grayscale', expand=None, trim=50):
+                          mode='grayscale', expand=None, trim=50, workers=None):
         """
-        Generates pictures from a recording file
+        Generates pictures from a recording file.
+
+        The per-image work is independent, so grayscale generation can optionally be spread
+        over a pool of worker processes by passing workers > 1. Note that nproc is part of
+        the row-averaging factor, not a worker count.
         """
 
         # Clipping parameters
@@ -659,12 +884,11 @@ class Recording(object):
             wide_freq = float(expand[2])
             wide_rate = float(expand[3])
             avg_factor = int(wide_rate / transm_rate)
-            mu = log_noise
+            # Zero-mean background, as the noise floor is subtracted out of the pictures
             sigma = float(noise_var) ** 0.5
-            noise_array = np.random.normal(mu-log_noise, sigma, (nlines, nfft * avg_factor))
+            noise_array = _noise_background(sigma, (nlines, nfft * avg_factor))
 
-        if not os.path.isdir(self.rec_pics_dir):
-            os.makedirs(self.rec_pics_dir)
+        os.makedirs(self.rec_pics_dir, exist_ok=True)
 
         # Use default picture prefix unless specified
         if not pic_prefix:
@@ -677,65 +901,75 @@ class Recording(object):
             if not os.path.isfile(self.dat_file):
                 self.gen_dat_file()
 
-            nbytes = npoints * 4
-
-            img_index = 0
-            with open(self.dat_file, "rb") as df:
-                while True:
-                    data = utils.load_bytes_from_fd(df, img_index * nbytes, (img_index + 1) * nbytes)
+            # Map the SNR file once; each image is then a zero-copy view into the OS page
+            # cache instead of a chunked seek + read + unpack per iteration. A trailing
+            # partial chunk is dropped, as the unpack-based reader did.
+            dat_mm = utils.mmap_samples(self.dat_file)
+            n_imgs = int(dat_mm.size // npoints)
+            if npics and npics > 0:
+                n_imgs = min(n_imgs, npics)
+
+            # Fan the images out to worker processes when requested; each worker maps the
+            # SNR file itself and renders its own image range. The expand path mutates a
+            # shared noise background, so it stays serial.
+            if workers and workers > 1 and not expand:
+                render = partial(_render_grayscale_image, self.dat_file, npoints=npoints, nfft=nfft,
+                                 greyscale_avg=navg * nproc, min_snr=min_snr, max_snr=max_snr,
+                                 pic_prefix=pic_prefix, outdir=self.rec_pics_dir, resize=(nfft, nlines))
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    # Consume the iterator so worker exceptions surface here
+                    list(executor.map(render, range(n_imgs),
+                                      chunksize=max(1, n_imgs // (workers * 4))))
+                del dat_mm
+                self.remove_dat_file()
+                self._invalidate_lists('_pic_list', '_compr_pic_list')
+                if not npics:
+                    npics = 'All'
+                log.info("%s pictures were generated in the directory: %s", npics, self.rec_pics_dir)
+                return
 
-                    if not data:  # No more data to unpack
-                        break
+            # One plotter reused for every saved image; the save path keeps no per-image state
+            pltr = Plotter()
+
+            for img_index in range(n_imgs):
+                # Reshape the view into an array of (nfft, nlines)
+                data = dat_mm[img_index * npoints:(img_index + 1) * npoints].reshape(-1, nfft)
+
+                # If expanding to a wider bandwidth average the loaded data accordingly and fit them into the
+                # previously created noise array (background)
+                if expand:
+                    if not trim:
+                        trim = 0
+                    # Position the transmission subarray in the new wider array
+                    new_start_freq = wide_freq - wide_rate / 2.0
+                    sub_array_center = int((transm_freq - new_start_freq) * (int(nfft) / wide_rate) * avg_factor)
+                    sub_array_size = int(nfft)
+                    sub_array_start = sub_array_center - sub_array_size // 2
+                    sub_array_end = sub_array_start + sub_array_size
+
+                    noise_array[:, sub_array_start + trim:sub_array_end - trim] = data[:, trim:-trim]
+
+                    data = noise_array
+
+                greyscale_avg = navg * nproc
+                if greyscale_avg > 1 and type(greyscale_avg) is int:
+                    # Average every greyscale_avg rows in one vectorized pass,
+                    # truncating a possibly incomplete last chunk of data
+                    nrows = (data.shape[0] // greyscale_avg) * greyscale_avg
+                    avg_data = data[:nrows].reshape(
+                        nrows // greyscale_avg, greyscale_avg, data.shape[1]).mean(axis=1)
+                else:
+                    # Copy out of the read-only mapping before clipping in place
+                    avg_data = np.array(data)
 
-                    # Reshape into an array of (nfft, nlines)
-                    data = utils.data_reshape(data, -1, nfft)
-
-                    # If expanding to a wider bandwidth average the loaded data accordingly and fit them into the
-                    # previously created noise array (background)
-                    if expand:
-                        if not trim:
-                            trim = 0
-                        # Position the transmission subarray in the new wider array
-                        new_start_freq = wide_freq - wide_rate / 2.0
-                        sub_array_center = int((transm_freq - new_start_freq) * (int(nfft) / wide_rate) * avg_factor)
-                        sub_array_size = int(nfft)
-                        sub_array_start = sub_array_center - sub_array_size / 2
-                        sub_array_end = sub_array_start + sub_array_size
-
-                        noise_array[:, sub_array_start + trim:sub_array_end - trim] = data[:, trim:-trim]
-
-                        data = noise_array
-
-                    greyscale_avg = navg * nproc
-                    if greyscale_avg > 1 and type(greyscale_avg) is int:
-                        avg_data = np.empty((int(data.shape[0] / greyscale_avg), data.shape[1]))
-                        for i in range(0, data.shape[0], greyscale_avg):
-                            try:
-                                avg_data[int(i / greyscale_avg)] = np.mean(data[i:i + greyscale_avg], axis=0, keepdims=True)
-                            except IndexError as e:
-                                if int(i / greyscale_avg) >= data.shape[0] / greyscale_avg:
-                                    # Last chunk of data reached
-                                    break
-                                else:
-                                    raise e
-                    else:
-                        avg_data = data
-
-                    avg_data = utils.data_clip(avg_data, min_snr, max_snr)
-                    avg_data = utils.img_flip(utils.img_scale(avg_data, min_snr, max_snr))
-
-                    img_name = "%s_%d.jpg" % (pic_prefix, img_index)
-
-                    pltr = Plotter()
-                    pltr.plot(data=avg_data, outfile=img_name, figdir=self.rec_pics_dir, resize=(nfft, nlines))
+                avg_data = utils.clip_scale_flip(avg_data, min_snr, max_snr, out=avg_data)
 
-                    img_index += 1
+                img_name = "%s_%d.jpg" % (pic_prefix, img_index)
 
-                    # Check if img limit is reached and exit
-                    if npics and npics > 0:
-                        if img_index >= npics:
-                            break
+                pltr.plot(data=avg_data, outfile=img_name, figdir=self.rec_pics_dir, resize=(nfft, nlines))
 
+            # Release the mapping before removing the file it is backed by
+            del dat_mm
             self.remove_dat_file()
 
         elif mode.lower() == 'compressed':
@@ -744,6 +978,7 @@ class Recording(object):
                            log_noise=log_noise, img_mode=mode, disp="save", img_limit=npics)
             self.remove_fft_file()
 
+        self._invalidate_lists('_pic_list', '_compr_pic_list')
         if not npics:
             npics = 'All'
         pic_out_dir = self.rec_pics_dir if mode == 'grayscale' else self.compressed_pics_dir
@@ -4,9 +4,9 @@ Definition of dataset tables
 import pandas as pd
 import logging
 import os
-import json
+import re
 
-from collections import defaultdict
+from ._utils import dump_json
 
 log = logging.getLogger('spread')
 
@@ -26,6 +26,11 @@ class DatasetTable(object):
 
     string_size_thres = 20
 
+    # Class name abbreviations, applied with one precompiled scan instead of
+    # chained str.replace calls per cell
+    _short_name_map = {'lightbridge': 'LiBr', 'bluetooth': 'Blth', 'zigbee': 'ZgB'}
+    _short_name_pattern = re.compile('|'.join(_short_name_map))
+
     @staticmethod
     def get_short_name(data_str):
         """
@@ -38,27 +43,37 @@ class DatasetTable(object):
         if len(str(data_str)) < DatasetTable.string_size_thres:
             return data_str
         else:
-            return data_str.replace('lightbridge', 'LiBr').replace('bluetooth', 'Blth').replace('zigbee', 'ZgB')
+            return DatasetTable._short_name_pattern.sub(
+                lambda m: DatasetTable._short_name_map[m.group(0)], data_str)
 
     @staticmethod
-    def table_to_md_mapping(column, rec):
+    def table_rec_columns(recordings):
         """
-        Given a recording object, return the metadata info for the table columns
+        Given the recording objects, return the metadata info for the table as one
+        list per column, populated in a single pass over the recordings
         """
 
         # Mapping between table columns and recording attributes
-        table_rec_mapping = {
-                'Recording':            rec.name,
-                'Synthetic':            rec.metadata.synthetic,
-                'Sources':              '-' if not rec.metadata.synthetic else ','.join(rec.metadata.sources),
-                'Class':                DatasetTable.get_short_name(','.join(rec.metadata.d_class)),
-                'Channel':              DatasetTable.get_short_name(','.join(rec.metadata.channel)),
-                'Noise level (dB)':     round(rec.metadata.noise_pwr_db, 2),
-                'SNR (dB; estimate)':   DatasetTable.get_short_name("%s (%s)" % (','.join(rec.metadata.snr),
-                                                                                 ','.join(rec.metadata.snr_range))),
-            }
-
-        return table_rec_mapping[column]
+        cols = {
+            'Recording':            [],
+            'Synthetic':            [],
+            'Sources':              [],
+            'Class':                [],
+            'Channel':              [],
+            'Noise level (dB)':     [],
+            'SNR (dB; estimate)':   [],
+        }
+        for rec in recordings:
+            md = rec.metadata
+            cols['Recording'].append(rec.name)
+            cols['Synthetic'].append(md.synthetic)
+            cols['Sources'].append('-' if not md.synthetic else ','.join(md.sources))
+            cols['Class'].append(DatasetTable.get_short_name(','.join(md.d_class)))
+            cols['Channel'].append(DatasetTable.get_short_name(','.join(md.channel)))
+            cols['Noise level (dB)'].append(round(md.noise_pwr_db, 2))
+            cols['SNR (dB; estimate)'].append(DatasetTable.get_short_name(
+                "%s (%s)" % (','.join(md.snr), ','.join(md.snr_range))))
+        return cols
 
     def __init__(self, dataset, csv_file=None, json_file=None):
 
@@ -73,18 +88,16 @@ class DatasetTable(object):
         self.reclist_json_file = os.path.join(self.dataset.metadata_dir, "list_of_recordings.json")
 
         self.table_columns = self.table_format.split(', ')
-        self.table_dict = defaultdict(list)
 
-        for rec in self.dataset.sorted_recordings:
-            for column in self.table_columns:
-                try:
-                    self.table_dict[column].append(DatasetTable.table_to_md_mapping(column, rec))
-                except Exception as e:
-                    print(e, column)
-                    exit()
+        # Column-major layout: pandas takes each column list wholesale instead of
+        # pivoting per-recording row dicts during frame construction
+        try:
+            cols = DatasetTable.table_rec_columns(self.dataset.sorted_recordings)
+        except Exception as e:
+            print(e)
+            exit()
 
-        self.table = pd.DataFrame(data=self.table_dict)
-        self.table = self.table[self.table_format.split(', ')]
+        self.table = pd.DataFrame(cols, columns=self.table_columns)
 
     def get_table_str(self, index=False):
         """
@@ -116,5 +129,4 @@ class DatasetTable(object):
         """
         Saves the list of recording names to a json file
         """
-        with open(self.reclist_json_file, 'w') as jw:
-            json.dump(self.dataset.sorted_recording_names, jw)
+        dump_json(self.dataset.sorted_recording_names, self.reclist_json_file)
@@ -0,0 +1,90 @@
+"""
+Batched file reader backed by io_uring
+
+Used to fan in many small files (annotation sidecars) with ring submissions instead of one
+blocking read syscall per file. Requires the liburing Python bindings; callers should check
+URING_AVAILABLE and fall back to regular reads otherwise.
+"""
+import os
+import logging
+
+try:
+    import liburing
+    URING_AVAILABLE = True
+except ImportError:
+    liburing = None
+    URING_AVAILABLE = False
+
+__all__ = ['URING_AVAILABLE', 'read_many']
+
+log = logging.getLogger('spread')
+
+# Queue depth of the ring; reads are submitted in batches of this size
+_QUEUE_DEPTH = 64
+# Largest file we expect to read in one go (annotation files are tiny)
+_READ_SIZE = 1 << 16
+
+
+def read_many(paths):
+    """
+    Reads the given files and returns a list with the contents of each as bytes, or None for
+    files that could not be read.
+
+    When the liburing bindings are available, the reads of each batch are submitted to a single
+    io_uring ring and completed together; otherwise the files are read sequentially.
+    """
+    if not URING_AVAILABLE:
+        return [_read_one(path) for path in paths]
+    try:
+        return _read_many_uring(paths)
+    except OSError as e:
+        log.error("io_uring read failed, falling back to sequential reads: %s", e)
+        return [_read_one(path) for path in paths]
+
+
+def _read_one(path):
+    """Plain read of a single file, returning None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except IOError:
+        return None
+
+
+def _read_many_uring(paths):
+    """
+    Reads the files through an io_uring ring, one submission per batch of _QUEUE_DEPTH files
+    """
+    results = [None] * len(paths)
+    ring = liburing.io_uring()
+    liburing.io_uring_queue_init(_QUEUE_DEPTH, ring, 0)
+    try:
+        for batch_start in range(0, len(paths), _QUEUE_DEPTH):
+            batch = paths[batch_start:batch_start + _QUEUE_DEPTH]
+            pending = {}
+            for offset, path in enumerate(batch):
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except OSError:
+                    continue
+                buf = bytearray(_READ_SIZE)
+                iov = liburing.iovec(buf)
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_readv(sqe, fd, iov, 1, 0)
+                sqe.user_data = offset
+                pending[offset] = (fd, buf)
+            if not pending:
+                continue
+            liburing.io_uring_submit_and_wait(ring, len(pending))
+            cqe = liburing.io_uring_cqe()
+            for _ in range(len(pending)):
+                liburing.io_uring_wait_cqe(ring, cqe)
+                if cqe.res >= 0:
+                    offset = cqe.user_data
+                    results[batch_start + offset] = bytes(pending[offset][1][:cqe.res])
+                liburing.io_uring_cqe_seen(ring, cqe)
+            for fd, _ in pending.values():
+                os.close(fd)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+    return results
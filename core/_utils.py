@@ -2,13 +2,57 @@
 Utils file that defines miscellaneous functions
 """
 
+import json
 import math
-import struct
 from . import constants
 import numpy as np
 from random import choice
 from PIL import Image
 
+try:
+    # Use the C-accelerated orjson parser for the metadata sidecars when installed
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Use hurry.filesize for more readable size output when installed
+    # (system si assumes 1K == 1000 instead of 1024)
+    from hurry.filesize import size as _h_size, si as _si
+    # Mapping from size suffix back to the absolute multiplier
+    _si_back_map = {x[1]: x[0] for x in _si}
+    _HAS_HURRY = True
+except ImportError:
+    _HAS_HURRY = False
+
+
+def load_json(path):
+    """
+    Loads a JSON file into a dictionary, using orjson when available and the standard json module
+    otherwise. Raises ValueError on malformed contents like json.load does.
+    """
+    if orjson:
+        with open(path, 'rb') as jf:
+            try:
+                return orjson.loads(jf.read())
+            except orjson.JSONDecodeError as e:
+                raise ValueError(str(e))
+    with open(path, 'r') as jf:
+        return json.load(jf)
+
+
+def dump_json(obj, path):
+    """
+    Stores an object as JSON in the given file, using orjson when available and the standard json
+    module otherwise.
+    """
+    if orjson:
+        with open(path, 'wb') as jf:
+            jf.write(orjson.dumps(obj))
+    else:
+        with open(path, 'w') as jf:
+            json.dump(obj, jf)
+
 
 def pwr_to_db(pwr):
     """
@@ -28,24 +72,34 @@ def add_noise_levels(db_noise_levels):
     """
     Gets a list of noise levels and returns the additive noise in dB
     """
-    absolute_noise_levels = [db_to_pwr(x) for x in db_noise_levels]
-    sum_noise = sum(absolute_noise_levels)
-    return pwr_to_db(sum_noise)
+    # Sum in the power domain with one vectorized round-trip instead of
+    # per-element math calls. Boxed back to a Python float: the result lands
+    # in metadata JSON and orjson rejects numpy scalars.
+    levels = np.asarray(db_noise_levels, dtype=np.float64)
+    return float(10.0 * np.log10(np.sum(np.power(10.0, levels / 10.0))))
 
 
 def load_bytes_from_fd(fd, start=None, end=None):
     """
-    Reads `batch` number of samples from a file descriptor into a tuple and returns the tuple
+    Reads a batch of float32 samples from a file descriptor and returns them as a numpy
+    array, or None when there is no more data. The array is a zero-copy view over the read
+    buffer, avoiding the per-sample boxing of a struct.unpack tuple; copy it before
+    mutating in place.
     """
     if start:
         fd.seek(start)
     binary = fd.read(end-start)
-    syntax = str(len(binary) / 4) + "f"
-    try:
-        data = struct.unpack(syntax, binary)
-        return data
-    except struct.error:        # not enough bytes to unpack, end of binary
-        return None
+    data = np.frombuffer(binary, dtype=np.float32, count=len(binary) // 4)
+    return data if data.size else None
+
+
+def mmap_samples(path):
+    """
+    Maps a float32 sample file into memory and returns it as a read-only array.
+    Slicing the mapping replaces the per-chunk seek/read/copy of load_bytes_from_fd;
+    the OS page cache streams the file on demand.
+    """
+    return np.memmap(path, dtype=np.float32, mode='r')
 
 
 def load_array_from_fd(fd):
@@ -67,35 +121,83 @@ def append_samples_to_file(filename, samples):
     """
     Appends the samples to file
     """
-    syntax = str(len(samples))+'f'
-    binary = struct.pack(syntax, *samples)
+    # One C-level write instead of star-unpacking every sample through struct.pack
     with open(filename, 'ab') as of:
-        of.write(binary)
+        np.asarray(samples, dtype=np.float32).tofile(of)
 
 
 def data_clip(data, min_snr, max_snr):
     """
-    Clip the lower and upper values in a matrix
+    Clip the lower and upper values in a matrix, in place
     """
-    if min_snr is not None:
-        data[data < min_snr] = min_snr
-    if max_snr is not None:
-        data[data > max_snr] = max_snr
-    return data
+    # np.clip does both bounds in one pass, without materializing boolean masks
+    if min_snr is None and max_snr is None:
+        return data
+    return np.clip(data, min_snr, max_snr, out=data)
 
 
 def img_scale(data, min_snr, max_snr):
     """
     Assuming data is already clipped
     """
-    return ((data-min_snr).astype(float)/(max_snr-min_snr)*255).astype(np.uint8)
+    # float32 is plenty for the 8-bit output and halves the intermediate's bandwidth;
+    # widening first also keeps half-precision inputs from overflowing, and the
+    # division and 255 multiply collapse into one scalar factor
+    return ((data.astype(np.float32, copy=False) - min_snr)
+            * (255.0 / (max_snr - min_snr))).astype(np.uint8)
 
 
 def img_flip(data, ax=0):
     """
-    Flip array along an axis
+    Flip array along an axis, returning a stride-reversed view
+    """
+    return data[::-1] if ax == 0 else data[:, ::-1]
+
+
+def _clip_scale_flip_2d(data, lo, hi, scale, out):
+    """
+    Single-pass clip/scale/flip of a 2D matrix into a preallocated uint8 array,
+    writing the rows in reverse so no intermediate float array is materialized.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    rows, cols = data.shape
+    for i in range(rows):
+        for j in range(cols):
+            v = data[i, j]
+            if v < lo:
+                v = lo
+            elif v > hi:
+                v = hi
+            out[rows - 1 - i, j] = np.uint8((v - lo) * scale)
+    return out
+
+
+try:
+    # JIT-compile the fused pixel kernel when numba is installed; the interpreted
+    # loop would be far slower than the vectorized fallback below
+    from numba import njit as _njit
+    _clip_scale_flip_2d = _njit(cache=True, fastmath=True)(_clip_scale_flip_2d)
+    _FUSED_KERNEL = True
+except ImportError:
+    _FUSED_KERNEL = False
+
+
+def clip_scale_flip(data, min_snr, max_snr, out=None):
+    """
+    Fused data_clip + img_scale + img_flip: clips to [min_snr, max_snr], scales to the 8-bit
+    image range and flips along the time axis in one pass, instead of allocating a fresh
+    array per step. A reusable float buffer of the same shape can be passed as out; the
+    input itself is left untouched unless it is given as the buffer.
     """
-    return np.flip(data, axis=ax)
+    if _FUSED_KERNEL and data.ndim == 2:
+        return _clip_scale_flip_2d(data, float(min_snr), float(max_snr),
+                                   255.0 / (max_snr - min_snr),
+                                   np.empty(data.shape, dtype=np.uint8))
+    scaled = np.clip(data, min_snr, max_snr, out=out)
+    scaled -= min_snr
+    scaled *= 255.0 / (max_snr - min_snr)
+    return np.flip(scaled.astype(np.uint8), axis=0)
 
 
 def stack_image_channels(img_data):
@@ -105,24 +207,98 @@ def stack_image_channels(img_data):
     return np.stack((img_data, img_data, img_data), axis=-1)
 
 
+def _pairwise_collide(cls_arr, ch_arr, cf_table, bw_table):
+    """
+    Sweeps all transmission pairs and returns True as soon as the channel ranges of two
+    collidable classes overlap.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    n = cls_arr.shape[0]
+    for i in range(n - 1):
+        cls_i = cls_arr[i]
+        if cls_i == 1 or cls_i == 4:
+            continue
+        i_cf = cf_table[cls_i, ch_arr[i]]
+        i_bw = bw_table[cls_i]
+        i_lo = i_cf - i_bw / 2.0
+        i_hi = i_cf + i_bw / 2.0
+        for j in range(i + 1, n):
+            cls_j = cls_arr[j]
+            if cls_j == 1 or cls_j == 4:
+                continue
+            j_cf = cf_table[cls_j, ch_arr[j]]
+            j_bw = bw_table[cls_j]
+            # Canonical branchless interval overlap; the old sign-product test only
+            # caught one range straddling the other's edge
+            if i_lo < j_cf + j_bw / 2.0 and j_cf - j_bw / 2.0 < i_hi:
+                return True
+    return False
+
+
+try:
+    # JIT-compile the pairwise sweep when numba is installed
+    from numba import njit
+    _pairwise_collide = njit(cache=True)(_pairwise_collide)
+except ImportError:
+    pass
+
+
+def _collision_scan(range2, left_offset1, width1, width2, error):
+    """
+    Scans the candidate offsets, counting those that overlap the first packet, and
+    returns a uniformly drawn one, or -1 when no overlap is possible.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    n = 0
+    for k in range(range2.shape[0]):
+        l2 = range2[k]
+        if l2 + width2 - error >= left_offset1 and l2 <= left_offset1 + width1 - error:
+            n += 1
+    if n == 0:
+        return -1
+    pick = np.random.randint(0, n)
+    for k in range(range2.shape[0]):
+        l2 = range2[k]
+        if l2 + width2 - error >= left_offset1 and l2 <= left_offset1 + width1 - error:
+            if pick == 0:
+                return l2
+            pick -= 1
+    return -1
+
+
+try:
+    # JIT-compile the candidate scan when numba is installed
+    from numba import njit as _cs_njit
+    _collision_scan = _cs_njit(cache=True)(_collision_scan)
+    _COLLISION_KERNEL = True
+except ImportError:
+    _COLLISION_KERNEL = False
+
+
 def check_collision(left_offset1, width1, range2, width2, error=5):
     """
     Checking if collision between two packets is possible
     """
-    lo2_choices = []
-    for lo2 in range2:
-        if left_offset1 > lo2 + width2 - error:
-            continue
+    range2 = np.asarray(range2)
 
-        if lo2 > left_offset1 + width1 - error:
-            break
+    if _COLLISION_KERNEL:
+        # Compiled scan: no mask or gathered-candidate temporaries per call
+        lo2 = _collision_scan(range2, left_offset1, width1, width2, error)
+        if lo2 < 0:     # Collision is not possible
+            return False, None
+        return True, lo2
 
-        lo2_choices.append(lo2)
+    # One vectorized mask over the candidate offsets instead of a continue/break scan
+    mask = (range2 + width2 - error >= left_offset1) & (range2 <= left_offset1 + width1 - error)
+    lo2_choices = range2[mask]
 
-    if len(lo2_choices) < 1:    # Collision is not possible
+    if lo2_choices.size < 1:    # Collision is not possible
         return False, None
     else:
-        return True, choice(lo2_choices)
+        # Boxed back to a Python int; Frame.add_packet asserts on the offset type
+        return True, int(choice(lo2_choices))
 
 
 def spectro_plot(data_img, img_name=None, display=True, save=False):
@@ -144,24 +320,18 @@ def convert_size(size_bytes, back=False):
     @param back:
     @return:
     """
-    try:
-        # Try to import hurry filesize for more readable output
-        from hurry.filesize import size as h_size, si           # (system si assumes 1K == 1000 instead of 1024)
+    if _HAS_HURRY:
         # For back conversion, return absolute bytes size given a string as input
         if back:
-            # If si is used the mapping is
-            back_map = {x[1]: x[0] for x in si}
-            # # Else
-            # back_map = {'B': 1, 'G': 1073741824, 'K': 1024, 'M': 1048576, 'P': 1125899906842624, 'T': 1099511627776}
             try:
-                return int(size_bytes[:-1])*back_map[size_bytes[-1]] if size_bytes != '0' else 0
+                return int(size_bytes[:-1])*_si_back_map[size_bytes[-1]] if size_bytes != '0' else 0
             except ValueError as e:
                 print (e)
                 return None
         else:
-            return h_size(size_bytes, system=si)
+            return _h_size(size_bytes, system=_si)
     # If package is not installed, print out in bytes
-    except ImportError:
+    else:
         if back:
             return int(size_bytes[:-1]) * constants.UNITS[size_bytes[-1]] if size_bytes != '0' else 0
         else:
@@ -173,12 +343,9 @@ def total_size(size_strs):
     Given a list of strings [1G, 500M, 2.5T] it calculates and returns a string with the total size
     """
     size_sum = sum([convert_size(x, back=True) for x in size_strs if x])
-    try:
-        # Try to import hurry filesize for more readable output
-        # noinspection PyUnresolvedReferences
-        from hurry.filesize import size as h_size, si           # (system si assumes 1K == 1000 instead of 1024)
-        total_size_str = h_size(size_sum, system=si)
-    except ImportError:
+    if _HAS_HURRY:
+        total_size_str = _h_size(size_sum, system=_si)
+    else:
         # Package not installed
         total_size_str = "%sB\t(Please install hurry.filesize package (pip install hurry.filesize)\
  for more readable output)" % size_sum
@@ -199,10 +366,11 @@ def get_pairs(item_list):
     """
     Given a list of items, returns all possible pair combinations.
     """
-    pairs = []
-    for i in item_list[:-1]:
-        pairs.extend([(i, j) for j in item_list[item_list.index(i)+1:len(item_list)]])
-    return pairs
+    # Pair by position: list.index rescanned the list per item and paired
+    # duplicates against the wrong tail
+    return [(item_list[i], item_list[j])
+            for i in range(len(item_list) - 1)
+            for j in range(i + 1, len(item_list))]
 
 
 def get_id_from_pic_name(picname):
@@ -225,19 +393,9 @@ def do_collide(transmissions):
     """
     Returns true if any pair of transmission settings (class and channel) in the given list causes a collision.
     """
-    for i in transmissions[:-1]:
-        if i[0] == 1 or i[0] == 4:
-            continue
-        for j in transmissions[transmissions.index(i)+1:]:
-            if j[0] == 1 or j[0] == 4:
-                continue
-            i_cf = constants.CHANNELS[i[0]][0][i[1]]
-            i_bw = constants.CHANNELS[i[0]][1]
-            i_range = (i_cf - i_bw / 2.0, i_cf + i_bw / 2.0)
-            j_cf = constants.CHANNELS[j[0]][0][j[1]]
-            j_bw = constants.CHANNELS[j[0]][1]
-            j_range = (j_cf - j_bw / 2.0, j_cf + j_bw / 2.0)
-            # print("%s %s" % ((i_range[0]-j_range[0]), (i_range[1]-i_range[1])))
-            if (i_range[0]-j_range[0]) * (i_range[1]-j_range[1]) < 0:
-                return True
-    return False
+    if len(transmissions) < 2:
+        return False
+    cls_arr = np.array([t[0] for t in transmissions], dtype=np.int64)
+    # Non-numeric channels ('n/a') belong to classes the sweep skips, any index will do
+    ch_arr = np.array([t[1] if isinstance(t[1], int) else 0 for t in transmissions], dtype=np.int64)
+    return bool(_pairwise_collide(cls_arr, ch_arr, constants.CF_TABLE, constants.BW_TABLE))
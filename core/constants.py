@@ -1,6 +1,8 @@
 """
 Constant values for the dataset toolset
 """
+import numpy as np
+
 CLASSES = {
     0: 'wifi',
     1: 'bluetooth',
@@ -65,6 +67,19 @@ CHANNELS = {
     4: ({x: y for x, y in zip(['n/a'], ['n/a'])}, 2),
 }
 
+# The same characteristics flattened into arrays indexed by [class, channel] and
+# [class], so hot paths can replace nested dict lookups with O(1) indexing.
+# Classes without numeric channels (bluetooth, wmic) stay NaN / zero.
+MAX_CHANNEL = max(max(chans) for chans, _ in CHANNELS.values()
+                  if all(isinstance(c, int) for c in chans))
+CF_TABLE = np.full((len(CHANNELS), MAX_CHANNEL + 1), np.nan)
+BW_TABLE = np.zeros(len(CHANNELS))
+for _cls, (_chans, _bw) in CHANNELS.items():
+    if all(isinstance(_c, int) for _c in _chans):
+        BW_TABLE[_cls] = _bw
+        for _ch, _cf in _chans.items():
+            CF_TABLE[_cls, _ch] = _cf
+
 """
 Constant values for the augmentation script
 """
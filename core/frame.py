@@ -1,23 +1,53 @@
 from __future__ import division
 import numpy as np
-import matplotlib.pyplot as plt
-import math
-from copy import deepcopy
+from functools import lru_cache
+
+from ._mix_kernel import mix_db, MIX_KERNEL_COMPILED
 
 COMMON_NOISE = -45
 
 
 class Frame(object):
-    def __init__(self, pathname, background_data, width, height):
+    def __init__(self, pathname, background_data, width, height, copy=True, defer=False):
         self.width = width
         self.height = height
         self.background = background_data
         self.background_length = self.background.shape[0]
 
-        self.frame_data = deepcopy(background_data)  # Background needs to be full-frame
+        # ndarray.copy is a plain memcpy, unlike deepcopy which pickles the array;
+        # callers that cede ownership of the background can pass copy=False.
+        # dB values fit float32 comfortably, and halving the element size halves
+        # the bandwidth of every per-pixel pass downstream
+        if copy or background_data.dtype != np.float32:
+            self.frame_data = background_data.astype(np.float32)  # Background needs to be full-frame
+        else:
+            self.frame_data = background_data
 
         self.packets = []  # Packets in the frame
 
+        # Buffered annotation lines, written out once by flush_annotations
+        self._annotations = []
+
+        # With defer=True, added packets queue here and are mixed in one pass by bake()
+        self._defer = defer
+        self._pending = []
+
+        self.pathname = pathname
+        self.annotation_pathname = pathname[:-4] + ".txt"
+
+    def reset(self, pathname, background_data, defer=False):
+        """
+        Rebind the frame to a new output path and restore the background into the
+        existing buffer. Callers rendering many frames of the same shape reuse one
+        Frame this way instead of paying an allocation and a copy per frame.
+        """
+        np.copyto(self.frame_data, background_data)
+        self.background = background_data
+        self.background_length = background_data.shape[0]
+        self.packets = []
+        self._annotations = []
+        self._defer = defer
+        self._pending = []
         self.pathname = pathname
         self.annotation_pathname = pathname[:-4] + ".txt"
 
@@ -32,12 +62,22 @@ class Frame(object):
         assert isinstance(left_offset, int) and isinstance(top_offset, int), \
             "The offsets are not properly set!"
 
-        # Adding packet to the current frame
-        for i in range(top_offset, top_offset + packet.length):
-            for j in range(left_offset, left_offset + packet.width):
-                log_to_pow_bg = pow(10.0, (self.frame_data[i][j] + noise) / 10.0)
-                log_to_pow_trans = pow(10.0, (packet_data[i - top_offset][j - left_offset] + noise) / 10.0)
-                self.frame_data[i][j] = 10 * math.log10(log_to_pow_bg + log_to_pow_trans) - noise
+        # Adding packet to the current frame: mix background and packet in the power
+        # domain over the whole covered slice at once, instead of a per-pixel Python loop
+        if self._defer:
+            # Queued for bake(): frames with many packets then pay for one
+            # exp/log round trip in total instead of one per packet
+            self._pending.append((packet_data, top_offset, left_offset))
+        elif MIX_KERNEL_COMPILED:
+            # One fused compiled pass over the region, without the temporaries
+            # the vectorized expression allocates
+            mix_db(self.frame_data, packet_data, top_offset, left_offset, float(noise))
+        else:
+            bg = self.frame_data[top_offset:top_offset + packet.length,
+                                 left_offset:left_offset + packet.width]
+            log_to_pow_bg = np.power(10.0, (bg + noise) / 10.0)
+            log_to_pow_trans = np.power(10.0, (packet_data + noise) / 10.0)
+            bg[...] = 10 * np.log10(log_to_pow_bg + log_to_pow_trans) - noise
 
         bottom_offset = self.height - packet.length - top_offset
 
@@ -49,20 +89,53 @@ class Frame(object):
         box_h = packet.length
         category = packet.category
 
-        # Append the bounding box to annotation file
-        fopen = open(self.annotation_pathname, 'a+')
-        fopen.write(str(category) + " " + str(round(box_x_c / self.width, 6)) + " " + str(
+        # Buffer the bounding box; one open/write per packet would cost a syscall pair
+        # per packet on frames with many packets
+        self._annotations.append(str(category) + " " + str(round(box_x_c / self.width, 6)) + " " + str(
             round(box_y_c / self.height, 6)) + " " + str(round(box_w / self.width, 6)) + " " + str(
             round(box_h / self.height, 6)) + "\n")
-        fopen.close()
 
         self.packets.append(packet)
 
         return
 
+    def bake(self):
+        """
+        Mix all deferred packets into the frame in a single pass: the frame is
+        converted to the power domain once, every queued packet region is
+        accumulated there, and the log is taken once at the end. The reference
+        noise level cancels out of the mix, so it does not appear here.
+        """
+        if not self._pending:
+            return
+        acc = np.power(10.0, self.frame_data / 10.0)
+        for data, top, left in self._pending:
+            acc[top:top + data.shape[0], left:left + data.shape[1]] += np.power(10.0, data / 10.0)
+        self.frame_data = (10.0 * np.log10(acc)).astype(np.float32)
+        self._pending = []
+
+    def flush_annotations(self):
+        """
+        Write the buffered bounding boxes to the annotation file in a single pass.
+        """
+        with open(self.annotation_pathname, 'w') as fopen:
+            fopen.writelines(self._annotations)
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _build_lut(cmap):
+        """
+        256-entry uint8 RGB table for a colormap, built once per colormap
+        """
+        return (cmap(np.linspace(0.0, 1.0, 256))[:, :3] * 255).astype(np.uint8)
+
     def convert_image(self, cmap, vmin, vmax):
         """
         Directly convert 2D data into RGB image data of a spectrogram
         """
-        norm = plt.Normalize(vmin, vmax)
-        return np.flip(np.array(np.floor(cmap(norm(self.frame_data)) * 256)[:, :, :-1]).astype(np.uint8), axis=0)
+        # Quantize the frame to 256 levels and index a precomputed LUT: one byte of
+        # index traffic per pixel instead of running the colormap over the full
+        # frame in float64 RGBA
+        lut = Frame._build_lut(cmap)
+        levels = np.clip((self.frame_data - vmin) * (255.0 / (vmax - vmin)), 0, 255).astype(np.uint8)
+        return lut[levels][::-1]
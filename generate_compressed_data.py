@@ -1,6 +1,10 @@
 """This tool generates compressed pictures and compresses existing annotations of recordings"""
 import argparse
 import logging
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from core import *
 
@@ -11,6 +15,17 @@ log = logging.getLogger('spread')
 log.setLevel(logging.INFO)
 
 
+def _compress_one(pictures_only, annotations_only, compr_avg, compr_proc, rec):
+    """Generate compressed pictures and annotations for one recording"""
+    mode = "compressed"
+    if not annotations_only:
+        log.info("Compressing pictures for recording %s", rec.name)
+        rec.generate_pictures(mode=mode, navg=compr_avg, nproc=compr_proc)
+    if not pictures_only:
+        log.info("Compressing annotations for recording %s", rec.name)
+        rec.compress_annotations(compr_avg * compr_proc)
+
+
 def gen_compressed_data(dataset, recordings, pictures_only, annotations_only, compr_avg, compr_proc):
     """Compress recording pictures"""
 
@@ -24,14 +39,15 @@ def gen_compressed_data(dataset, recordings, pictures_only, annotations_only, co
     else:
         recordings = [x for x in ds.recordings if not x.compressed_pic_list or len(x.compressed_pic_list) < 152]
 
-    mode = "compressed"
-    for rec in recordings:
-        if not annotations_only:
-            log.info("Compressing pictures for recording %s", rec.name)
-            rec.generate_pictures(mode=mode, navg=compr_avg, nproc=compr_proc)
-        if not pictures_only:
-            log.info("Compressing annotations for recording %s", rec.name)
-            rec.compress_annotations(compr_avg * compr_proc)
+    # Recordings are independent, so a small thread pool overlaps the reductions
+    # and file I/O across them. Threads rather than processes: picture generation
+    # already fans its image encodes out over all cores internally, so this only
+    # needs enough workers to keep the pipeline fed.
+    compress = partial(_compress_one, pictures_only, annotations_only, compr_avg, compr_proc)
+    workers = max(1, min(len(recordings), (os.cpu_count() or 1) // 2))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the iterator so worker exceptions surface here
+        list(executor.map(compress, recordings))
 
 
 def main():
@@ -15,7 +15,7 @@ log.setLevel(logging.INFO)
 
 
 def process_gen_pics(dataset_dir, recordings=None, mode='grayscale', overwrite=False, log_noise=None, fft_size=512,
-                     img_limit=0, filters=None):
+                     img_limit=0, filters=None, workers=None):
     """
     Generates pictures of a recording and saves them in the picture directory of the dataset
     """
@@ -31,17 +31,20 @@ def process_gen_pics(dataset_dir, recordings=None, mode='grayscale', overwrite=F
     else:
         to_pic = ds.recordings
 
-    for rec in to_pic:
-        if not rec:
-            log.error("No recording found")
-            continue
-        else:
-            if not rec.metadata.no_of_pictures or rec.metadata.no_of_pictures == 0 or overwrite:
-                rec.generate_pictures(log_noise=log_noise, npics=img_limit, mode=mode,
-                                      nfft=fft_size)
+    # Defer the per-step metadata writes and flush each dirty metafile once at
+    # the end of the batch
+    with ds.batched_metadata():
+        for rec in to_pic:
+            if not rec:
+                log.error("No recording found")
+                continue
             else:
-                log.info("Skipping recording %s because pictures already exist. Specify \"--overwrite\" if desired.",
-                         rec.name)
+                if not rec.metadata.no_of_pictures or rec.metadata.no_of_pictures == 0 or overwrite:
+                    rec.generate_pictures(log_noise=log_noise, npics=img_limit, mode=mode,
+                                          nfft=fft_size, workers=workers)
+                else:
+                    log.info("Skipping recording %s because pictures already exist. Specify \"--overwrite\" if desired.",
+                             rec.name)
 
 
 def main():
@@ -69,10 +72,13 @@ def main():
                         help='Number of pictures to generate (default: 0 (all pictures)')
     parser.add_argument("--fft-size", type=int, default=512,
                         help="FFT size")
+    parser.add_argument("--workers", type=int,
+                        help="Number of worker processes for picture generation. If omitted, pictures are "
+                             "generated serially.")
     args = parser.parse_args()
 
     process_gen_pics(args.dataset, args.recordings, args.mode, args.overwrite, args.log_noise, args.fft_size,
-                     args.img_limit, args.filter)
+                     args.img_limit, args.filter, args.workers)
 
 
 if __name__ == '__main__':